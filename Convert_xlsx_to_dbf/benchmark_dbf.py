@@ -0,0 +1,235 @@
+"""
+Compare the row-by-row dbf.Table writer with dbf_writer on synthetic DRG data.
+
+Usage: python benchmark_dbf.py [rows]
+
+All paths (row-by-row, columnar, parallel chunks) write the same schema and
+values; the script checks the output files are byte-identical to the
+previous sql_to_dbf.py and prints rows/sec for each. It then checks that
+time fields given as clock text or time objects are written as HHMM.
+"""
+import contextlib
+import datetime
+import io
+import os
+import sys
+import tempfile
+import time
+
+import dbf
+import numpy as np
+from dbfread import DBF
+import pandas as pd
+
+from drg_schema import DRG_SCHEMA, DRG_TABLE_STRUCTURE
+
+# --------------------------- Row-by-row reference (previous sql_to_dbf.py) ---------------------------
+# Copied from the baseline script, so the comparison is against what it really wrote:
+# TimeAdm/TimeDsc went through to_str, i.e. text already in HHMM form was kept as is.
+
+def to_str(val, length=1, default=''):
+    if pd.isna(val) or str(val).strip() == '':
+        return default.ljust(length)[:length]
+    val = str(val).strip()
+    if val.endswith('.0'):
+        val = val[:-2]
+    return val.ljust(length)[:length]
+
+
+def to_num(val, default=0, is_int=False):
+    try:
+        val = float(val)
+        if pd.isna(val) or pd.isnull(val) or val != val:
+            return default
+        return int(val) if is_int else val
+    except (ValueError, TypeError):
+        return default
+
+
+def to_date(val):
+    if pd.isnull(val):
+        return None
+    if isinstance(val, datetime.datetime):
+        return val.date()
+    if isinstance(val, datetime.date):
+        return val
+    return None
+
+
+def write_rowwise(path, df):
+    df = df.replace({pd.NA: '', 'nan': '', 'NaN': ''})
+    table = dbf.Table(path, DRG_TABLE_STRUCTURE)
+    table.open(mode=dbf.READ_WRITE)
+    failed = 0
+    for i, row in df.iterrows():
+        try:
+            table.append((
+                to_date(row['DOB']), to_str(row['Sex'], 1, 'U'), to_date(row['DateAdm']),
+                to_str(row['TimeAdm'], 4, '0000'), to_date(row['DateDsc']), to_str(row['TimeDsc'], 4, '0000'),
+                to_str(row['Discht'], 1, 'U'), to_num(row['AdmWt'], 0.0),
+                to_str(row['Age'], 3, '000'), to_str(row['AgeDay'], 3, '000'), to_str(row['PDx'], 6, 'UNK'),
+                *[to_str(row[f'SDx{n}'], 6) for n in range(1, 13)],
+                *[to_str(row[f'Proc{n}'], 7) for n in range(1, 21)],
+                to_num(row['LeaveDay'], 0, is_int=True), to_num(row['ActLOS'], 0, is_int=True),
+                to_num(row['Warn'], 0, is_int=True), to_num(row['Err'], 0, is_int=True),
+                to_str(row['DRG'], 5, '000'), to_str(row['MDC'], 2, '00'),
+                to_num(row['RW'], 0.0), to_num(row['WTLOS'], 0.0),
+                to_num(row['OT'], 0, is_int=True), to_num(row['ADJRW'], 0.0),
+            ))
+        except Exception:
+            failed += 1
+    table.close()
+    return failed
+
+
+# to_hhmm from the previous "ConvertXLSX to DBF", the rule both front-ends now share for time fields
+def to_hhmm(val):
+    if pd.isna(val) or str(val).strip() == '':
+        return '0000'
+    try:
+        if isinstance(val, datetime.time):
+            return val.strftime('%H%M')
+        elif isinstance(val, datetime.datetime):
+            return val.strftime('%H%M')
+        elif isinstance(val, str):
+            parsed = pd.to_datetime(val).time()
+            return parsed.strftime('%H%M')
+        else:
+            return '0000'
+    except:
+        return '0000'
+
+
+def write_columnar(path, df):
+    _, errors = DRG_SCHEMA.write(path, df)
+    return len(errors)
+
+
+def write_parallel(path, df, workers=None, chunk_size=20_000):
+    chunks = (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, errors = DRG_SCHEMA.export(path, chunks, max_workers=workers)
+    return len(errors)
+
+
+# --------------------------- Synthetic data ---------------------------
+
+def make_synthetic_drg(n_rows, seed=0):
+    """DRG-like rows shaped like the SQL view: times are HHMM text, with blanks and NULLs."""
+    rng = np.random.default_rng(seed)
+
+    def codes(prefix_pool, width, blank_share):
+        values = np.char.add(rng.choice(prefix_pool, n_rows), rng.integers(0, 10 ** (width - 1), n_rows).astype(str))
+        values = values.astype(object)
+        values[rng.random(n_rows) < blank_share] = ''
+        return values
+
+    admit = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, n_rows), unit='min')
+    dob = pd.Series(pd.Timestamp('1940-01-01') + pd.to_timedelta(rng.integers(0, 80 * 365, n_rows), unit='D'))
+    dob[rng.random(n_rows) < 0.02] = pd.NaT
+    def times():
+        values = np.array([f'{h:02d}{m:02d}' for h, m in zip(rng.integers(0, 24, n_rows), rng.integers(0, 60, n_rows))],
+                          dtype=object)
+        values[rng.random(n_rows) < 0.05] = ''
+        values[rng.random(n_rows) < 0.02] = None
+        return values
+
+    df = pd.DataFrame({
+        'DOB': dob,
+        'Sex': rng.choice(['1', '2', '', None], n_rows, p=[0.48, 0.48, 0.02, 0.02]),
+        'DateAdm': admit.normalize(),
+        'TimeAdm': times(),
+        'DateDsc': (admit + pd.to_timedelta(rng.integers(0, 30, n_rows), unit='D')).normalize(),
+        'TimeDsc': times(),
+        'Discht': rng.choice(['1', '2', '3', '4'], n_rows),
+        'AdmWt': np.where(rng.random(n_rows) < 0.9, np.nan, rng.random(n_rows) * 5),
+        'Age': rng.integers(0, 100, n_rows).astype(str),
+        'AgeDay': rng.integers(0, 365, n_rows),
+        'PDx': codes(['A', 'I', 'J', 'K'], 5, 0.01),
+    })
+    for k in range(1, 13):
+        df[f'SDx{k}'] = codes(['E', 'I', 'N', 'Z'], 5, min(0.95, 0.3 + k * 0.06))
+    for k in range(1, 21):
+        df[f'Proc{k}'] = codes(['', '8', '9'], 6, min(0.98, 0.4 + k * 0.03))
+    # Small negative fractions truncate to 0, never '-0'
+    df['LeaveDay'] = np.where(rng.random(n_rows) < 0.01, -0.4, rng.integers(0, 3, n_rows))
+    df['ActLOS'] = rng.integers(0, 60, n_rows).astype(float)
+    df['Warn'] = np.where(rng.random(n_rows) < 0.5, np.nan, rng.integers(0, 64, n_rows))
+    df['Err'] = rng.integers(0, 10, n_rows)
+    df['DRG'] = codes(['0', '1', '2'], 5, 0.0)
+    df['MDC'] = rng.integers(0, 25, n_rows).astype(str)
+    df['RW'] = rng.random(n_rows) * 10
+    df['WTLOS'] = rng.random(n_rows) * 30
+    df['OT'] = rng.integers(0, 5, n_rows)
+    df['ADJRW'] = rng.random(n_rows) * 12
+    # A few values dbf cannot store: both writers must drop these rows
+    df.loc[df.index[::997], 'WTLOS'] = 99999.0
+    df.loc[df.index[::1999], 'LeaveDay'] = np.inf
+    return df
+
+
+def check_string_times(n_rows=2_000, seed=1):
+    """
+    Time fields given as clock text ('08:30', '8:30 PM') and time objects, as
+    Excel sheets hold them, must come out as the HHMM that to_hhmm gives.
+    (The previous sql_to_dbf.py truncated such text to '08:3'.)
+    """
+    rng = np.random.default_rng(seed)
+    df = make_synthetic_drg(n_rows, seed)
+    hours, minutes = rng.integers(0, 24, n_rows), rng.integers(0, 60, n_rows)
+    clock = [f'{h:02d}:{m:02d}' for h, m in zip(hours, minutes)]
+    twelve = [f'{(h - 1) % 12 + 1}:{m:02d} {"AM" if h < 12 else "PM"}' for h, m in zip(hours, minutes)]
+    objects = [datetime.time(h, m) for h, m in zip(hours, minutes)]
+    shape = rng.integers(0, 4, n_rows)
+    df['TimeAdm'] = [c if s == 0 else t if s == 1 else o if s == 2 else '' for c, t, o, s in
+                     zip(clock, twelve, objects, shape)]
+    df['TimeDsc'] = pd.Series(clock, dtype=object)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'times.dbf')
+        _, errors = DRG_SCHEMA.write(path, df)
+        written = pd.DataFrame(iter(DBF(path, encoding='ascii')))
+    kept = df.drop(index=df.index[list(errors)]).reset_index(drop=True)
+    ok = all((written[field.upper()] == kept[field].map(to_hhmm)).all() for field in ('TimeAdm', 'TimeDsc'))
+    print(f"String times ('08:30', '8:30 PM', time objects) written as HHMM: {ok}")
+    return ok
+
+
+def benchmark(n_rows=50_000):
+    df = make_synthetic_drg(n_rows)
+    print(f"Synthetic DRG data: {n_rows:,} rows x {len(df.columns)} columns")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rowwise_path = os.path.join(tmp, 'rowwise.dbf')
+        columnar_path = os.path.join(tmp, 'columnar.dbf')
+        parallel_path = os.path.join(tmp, 'parallel.dbf')
+
+        started = time.perf_counter()
+        failed_rowwise = write_rowwise(rowwise_path, df)
+        rowwise_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        failed_columnar = write_columnar(columnar_path, df)
+        columnar_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        failed_parallel = write_parallel(parallel_path, df)
+        parallel_seconds = time.perf_counter() - started
+
+        with open(rowwise_path, 'rb') as a, open(columnar_path, 'rb') as b, open(parallel_path, 'rb') as c:
+            rowwise_bytes = a.read()
+            identical = rowwise_bytes == b.read() and rowwise_bytes == c.read()
+
+    print(f"{'row-by-row (dbf)':<20}{rowwise_seconds:>8.2f}s {n_rows / rowwise_seconds:>12,.0f} rows/sec "
+          f"({failed_rowwise} rows rejected)")
+    print(f"{'columnar':<20}{columnar_seconds:>8.2f}s {n_rows / columnar_seconds:>12,.0f} rows/sec "
+          f"({failed_columnar} rows rejected)")
+    print(f"{f'parallel ({os.cpu_count()} procs)':<20}{parallel_seconds:>8.2f}s {n_rows / parallel_seconds:>12,.0f} rows/sec "
+          f"({failed_parallel} rows rejected)")
+    print(f"Byte-identical to previous sql_to_dbf.py: {identical}, speedup {rowwise_seconds / columnar_seconds:.1f}x columnar, "
+          f"{rowwise_seconds / parallel_seconds:.1f}x parallel")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
+    check_string_times()
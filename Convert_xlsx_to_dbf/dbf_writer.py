@@ -0,0 +1,635 @@
+import datetime
+import functools
+import os
+import re
+import struct
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import numpy as np
+import pandas as pd
+
+# One DBF field: name, type (C/D/N), width in bytes, decimals, offset in the record
+Field = namedtuple("Field", ["name", "type", "length", "decimals", "start"])
+
+FIELD_SPEC = re.compile(r"^\s*(\w+)\s+([CDN])\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?\s*$", re.IGNORECASE)
+
+
+def parse_table_structure(table_structure):
+    """
+    Parse a `dbf.Table` field spec such as 'DOB D; Sex C(1); AdmWt N(7,3)'.
+
+    Returns:
+        List of Field with upper-case names and record offsets (the deleted
+        flag takes byte 0, so the first field starts at 1)
+    """
+    fields = []
+    start = 1
+    for spec in table_structure.split(";"):
+        if not spec.strip():
+            continue
+        match = FIELD_SPEC.match(spec)
+        if match is None:
+            raise ValueError(f"Cannot parse DBF field spec: {spec.strip()!r}")
+        name, field_type, length, decimals = match.groups()
+        field_type = field_type.upper()
+        if len(name) > 10:
+            raise ValueError(f"DBF field name longer than 10 characters: {name!r}")
+        if field_type == "D":
+            length, decimals = 8, 0
+        elif length is None:
+            raise ValueError(f"Field {name!r} of type {field_type} needs a width")
+        else:
+            length, decimals = int(length), int(decimals or 0)
+        fields.append(Field(name.upper(), field_type, length, decimals, start))
+        start += length
+    return fields
+
+
+# --------------------------- Column converters ---------------------------
+# Whole-column versions of the per-cell to_str / to_num / to_date / to_hhmm
+# helpers. Each returns a Series aligned with its input.
+
+def _is_blank(series):
+    """pd.isna(val) or str(val).strip() == '' for every cell."""
+    blank = series.isna()
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        blank |= series.astype(str).str.strip().eq("")
+    return blank
+
+
+def _cell_strings(series):
+    """str(val) for every cell, as the row-wise code saw it through iterrows()."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.map(str)
+    return series.astype(object).astype(str)
+
+
+def str_column(series, length=1, default="", strip_float_suffix=False):
+    """
+    Pad/truncate a column to a character field, using `default` for blanks.
+
+    Args:
+        series: Source column
+        length: Field width
+        default: Value used for NaN/blank cells
+        strip_float_suffix: Drop a trailing ".0" (e.g. codes read as 2211.0)
+    """
+    blank = _is_blank(series)
+    text = _cell_strings(series).str.strip()
+    if strip_float_suffix:
+        text = text.str.replace(r"\.0$", "", regex=True)
+    text = text.where(~blank, default)
+    return text.str.slice(0, length)
+
+
+def num_column(series, default=0, is_int=False):
+    """
+    Convert a column to numbers, using `default` where float(val) fails or is NaN.
+
+    Values that cannot be stored at all (infinity) are left as inf so the
+    writer reports those rows as errors, like the row-wise code did.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        values = series.astype("float64")
+    else:
+        values = pd.to_numeric(series, errors="coerce").astype("float64")
+        # float() accepts a few spellings to_numeric does not (e.g. "1_000")
+        retry = values.isna() & series.notna()
+        if retry.any():
+            values[retry] = series[retry].map(_python_float)
+
+    values = values.fillna(default)
+    if is_int:
+        finite = np.isfinite(values)
+        # int(-0.4) is 0, but trunc gives -0.0, which '%f' would write as '-0'
+        values = values.where(~finite, np.trunc(values) + 0.0)
+    return values
+
+
+def _python_float(val):
+    try:
+        return float(val)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def date_column(series):
+    """Keep date/datetime cells and blank everything else (strings, NaN, numbers)."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.to_datetime(series)
+    is_date = series.map(lambda v: isinstance(v, datetime.date) and not pd.isna(v))
+    result = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    if is_date.any():
+        result[is_date] = pd.to_datetime(series[is_date].map(
+            lambda v: datetime.datetime(v.year, v.month, v.day)))
+    return result
+
+
+HHMM_DIGITS = re.compile(r"^\d{1,4}(\.0+)?$")
+
+
+def hhmm_column(series):
+    """
+    Format time cells as HHMM, else '0000'.
+
+    Accepts time/datetime cells, parseable time strings ('08:30', '8:30 PM')
+    and values already in HHMM form ('0830', 830, 830.0), which are
+    zero-padded to four digits.
+    """
+    result = pd.Series("0000", index=series.index, dtype=object)
+    blank = _is_blank(series)
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        ok = ~blank
+        result[ok] = series[ok].dt.strftime("%H%M")
+        return result
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        ok = series.notna() & (series >= 0) & (series < 2400) & (series == np.trunc(series))
+        result[ok] = series[ok].astype("int64").astype(str).str.zfill(4)
+        return result
+
+    is_number = series.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool)) & ~blank
+    if is_number.any():
+        numbers = pd.to_numeric(series[is_number], errors="coerce")
+        ok = (numbers >= 0) & (numbers < 2400) & (numbers == np.trunc(numbers))
+        result[ok[ok].index] = numbers[ok].astype("int64").astype(str).str.zfill(4)
+
+    is_clock = series.map(lambda v: isinstance(v, (datetime.time, datetime.datetime))) & ~blank
+    if is_clock.any():
+        result[is_clock] = series[is_clock].map(lambda v: v.strftime("%H%M"))
+
+    is_text = series.map(lambda v: isinstance(v, str)) & ~blank
+    if is_text.any():
+        # Times repeat a lot: parse each distinct string once
+        text = series[is_text]
+        distinct = pd.Series(text.unique(), dtype=object)
+        stripped = distinct.str.strip()
+        digits = stripped.str.match(HHMM_DIGITS)
+        formatted = pd.Series("0000", index=distinct.index, dtype=object)
+        formatted[digits] = stripped[digits].str.split(".").str[0].str.zfill(4)
+        # Only clock text is parsed: '0830' would parse as a date far outside strftime's range
+        parsed = pd.to_datetime(distinct[~digits], errors="coerce", format="mixed")
+        ok = parsed.notna()
+        formatted[ok[ok].index] = (parsed[ok].dt.hour.astype(str).str.zfill(2)
+                                   + parsed[ok].dt.minute.astype(str).str.zfill(2))
+        result[is_text] = text.map(dict(zip(distinct, formatted)))
+    return result
+
+
+# --------------------------- Schema ---------------------------
+
+class DbfSchema:
+    """
+    A DBF layout plus the conversion rule for every field.
+
+    The rule per field is chosen once from the field type and the declared
+    defaults: C fields are padded/truncated text with a default for blanks,
+    N fields are numbers (integers when there are no decimals), D fields are
+    dates, and `time_fields` are C fields holding HHMM. The compiled list of
+    converters is then applied to whole columns of every chunk, whatever the
+    source (Excel, SQL, CSV, Parquet).
+
+    Source columns are matched to field names case-insensitively, so
+    'WtLOS' and 'WTLOS' both feed the WTLOS field.
+    """
+
+    def __init__(self, table_structure, defaults=None, time_fields=(), encoding="ascii"):
+        self.table_structure = table_structure
+        self.fields = parse_table_structure(table_structure)
+        self.encoding = encoding
+        defaults = {name.upper(): value for name, value in (defaults or {}).items()}
+        time_fields = {name.upper() for name in time_fields}
+
+        unknown = (set(defaults) | time_fields) - {f.name for f in self.fields}
+        if unknown:
+            raise ValueError(f"Defaults/time fields not in the table structure: {sorted(unknown)}")
+
+        self.converters = [self._compile(field, defaults, time_fields) for field in self.fields]
+
+    @staticmethod
+    def _compile(field, defaults, time_fields):
+        if field.name in time_fields:
+            return hhmm_column
+        if field.type == "D":
+            return date_column
+        if field.type == "N":
+            is_int = field.decimals == 0
+            default = defaults.get(field.name, 0 if is_int else 0.0)
+            return functools.partial(num_column, default=default, is_int=is_int)
+        return functools.partial(str_column, length=field.length, default=defaults.get(field.name, ""),
+                                 strip_float_suffix=True)
+
+    def source_columns(self, df):
+        """Map every field to its column in `df` (case-insensitive); raises KeyError if one is missing."""
+        by_name = {str(c).strip().upper(): c for c in df.columns}
+        missing = [f.name for f in self.fields if f.name not in by_name]
+        if missing:
+            raise KeyError(f"Source is missing columns for DBF fields: {missing}")
+        return [by_name[f.name] for f in self.fields]
+
+    def convert(self, df):
+        """Convert one DataFrame (or chunk) to the column list encode_records expects."""
+        columns = []
+        for convert, name in zip(self.converters, self.source_columns(df)):
+            series = df[name]
+            if series.dtype == object:
+                # "nan"/"NaN" strings left over from exports count as blank
+                series = series.replace({"nan": "", "NaN": ""})
+            columns.append(convert(series))
+        return columns
+
+    def write(self, path, df):
+        """Write one DataFrame; returns (record_count, errors)."""
+        return write_dbf(path, self.fields, self.convert(df), self.encoding)
+
+    def export(self, path, chunks, max_workers=1, ordered=True):
+        """
+        Stream an iterable of DataFrames; returns (record_count, errors).
+
+        With max_workers other than 1 the chunks are converted in parallel
+        by export_parallel (None uses every core).
+        """
+        if max_workers == 1:
+            return export_chunks(path, self.fields, chunks, self.convert, self.encoding)
+        return export_parallel(path, self.fields, chunks, self.convert, self.encoding, max_workers, ordered)
+
+
+def iter_source(source, query=None, chunksize=50_000, sheet_name=0):
+    """
+    Yield DataFrame chunks from an Excel, CSV or Parquet file, or a SQL query.
+
+    Args:
+        source: Path to .xlsx/.xls/.csv/.parquet, or a DB-API / SQLAlchemy
+            connection when `query` is given
+        query: SQL text to run on the `source` connection
+        chunksize: Rows per chunk (Excel is read in one piece)
+        sheet_name: Sheet to read from an Excel file
+    """
+    if query is not None:
+        yield from pd.read_sql_query(query, source, chunksize=chunksize)
+        return
+
+    suffix = os.path.splitext(str(source))[1].lower()
+    if suffix in (".xlsx", ".xlsm", ".xls"):
+        yield pd.read_excel(source, sheet_name=sheet_name)
+    elif suffix == ".csv":
+        yield from pd.read_csv(source, chunksize=chunksize)
+    elif suffix == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported source type: {source!r}")
+
+
+# --------------------------- Record encoding ---------------------------
+
+def _encode_character(field, values, encoding, errors):
+    """Return (n, length) uint8 block for a C field; bad rows are added to `errors`."""
+    text = values.fillna("").astype(str).str.strip()
+    if encoding.lower().replace("-", "") in ("ascii", "usascii") and len(text):
+        return _encode_ascii(field, text, errors)
+
+    try:
+        encoded = text.str.encode(encoding)
+    except UnicodeEncodeError:
+        encoded = text.map(lambda v: _try_encode(v, encoding))
+    bad = encoded.isna()
+    for index in np.flatnonzero(bad.to_numpy()):
+        errors.setdefault(index, f"field '{field.name}': cannot encode {text.iloc[index]!r} as {encoding}")
+    encoded = encoded.where(~bad, b"")
+
+    # dbf keeps bytes past the width only if they are blanks, which it drops
+    lengths = encoded.str.len().to_numpy()
+    too_long = lengths > field.length
+    if too_long.any():
+        trimmed = encoded[too_long].map(lambda b: b[:field.length] if not b[field.length:].strip() else None)
+        for index, value in zip(np.flatnonzero(too_long), trimmed):
+            if value is None:
+                errors.setdefault(index, f"field '{field.name}': tried to store {lengths[index]} bytes "
+                                         f"in {field.length} byte field")
+        encoded[too_long] = trimmed.fillna(b"")
+
+    return _fixed_width(encoded.to_numpy(), field.length)
+
+
+def _encode_ascii(field, text, errors):
+    """ASCII fast path: work on the UTF-32 code points numpy already holds."""
+    width = max(int(text.str.len().max()), field.length, 1)
+    codes = text.to_numpy(dtype=f"U{width}").view(np.uint32).reshape(-1, width)
+
+    non_ascii = (codes >= 128).any(axis=1)
+    for index in np.flatnonzero(non_ascii):
+        errors.setdefault(index, f"field '{field.name}': cannot encode {text.iloc[index]!r} as ascii")
+    # Text is stripped, so anything past the width is a non-blank overflow
+    too_long = ~non_ascii & (codes[:, field.length:] != 0).any(axis=1)
+    for index in np.flatnonzero(too_long):
+        errors.setdefault(index, f"field '{field.name}': tried to store {len(text.iloc[index])} bytes "
+                                 f"in {field.length} byte field")
+
+    block = codes[:, :field.length].astype(np.uint8)
+    block[non_ascii | too_long] = 0
+    block[block == 0] = ord(" ")
+    return block
+
+
+def _try_encode(value, encoding):
+    try:
+        return value.encode(encoding)
+    except UnicodeEncodeError:
+        return None
+
+
+def _fixed_width(byte_values, length):
+    """Left-align byte strings in an (n, length) block padded with spaces."""
+    block = np.array(byte_values, dtype=f"S{length}").view(np.uint8).reshape(-1, length).copy()
+    # numpy pads with NUL; dbf pads with blanks
+    block[block == 0] = ord(" ")
+    return block
+
+
+def _encode_date(field, values):
+    dates = pd.to_datetime(values)
+    missing = dates.isna().to_numpy()
+    stamp = (dates.dt.year.fillna(0) * 10000 + dates.dt.month.fillna(0) * 100
+             + dates.dt.day.fillna(0)).astype("int64")
+    text = stamp.astype(str).str.zfill(8).to_numpy().astype("S8")
+    text[missing] = b"        "
+    return text.view(np.uint8).reshape(-1, 8)
+
+
+def _encode_numeric(field, values, errors):
+    """Format a numeric column exactly like dbf's update_numeric ('%*.*f')."""
+    values = np.asarray(values, dtype="float64")
+    length, decimals = field.length, field.decimals
+    max_integer = length - (decimals + 1 if decimals else 0)
+
+    finite = np.isfinite(values)
+    integral = finite & (values == np.trunc(values)) & (np.abs(values) < 2 ** 53)
+    if decimals == 0 and integral.all():
+        text = pd.Series(values.astype("int64")).astype(str).str.rjust(length)
+    else:
+        text = pd.Series(["%*.*f" % (length, decimals, v) if f else "" for v, f in zip(values, finite)])
+
+    # Width of "%.0f" % floor(value) must fit before the decimal point
+    floor = np.floor(np.where(finite, values, 0))
+    too_big = np.where(floor >= 0, floor >= 10.0 ** max_integer, -floor >= 10.0 ** (max_integer - 1))
+    if max_integer == 0:
+        too_big &= ~((floor >= 0) & (floor <= 9))
+    too_long = text.str.len().to_numpy() > length
+
+    for index in np.flatnonzero(~finite):
+        errors.setdefault(index, f"field '{field.name}': cannot store {values[index]}")
+    for index in np.flatnonzero(finite & too_big):
+        errors.setdefault(index, f"field '{field.name}': Integer portion too big")
+    for index in np.flatnonzero(finite & ~too_big & too_long):
+        errors.setdefault(index, f"field '{field.name}': tried to store {len(text[index])} bytes "
+                                 f"in {length} byte field")
+
+    text = text.where(finite & ~too_big & ~too_long, "")
+    return _fixed_width(text.to_numpy(dtype=object), length)
+
+
+def encode_records(fields, columns, encoding="ascii"):
+    """
+    Build fixed-width DBF records for whole columns at once.
+
+    Args:
+        fields: List of Field from parse_table_structure
+        columns: One converted column per field (str_column, num_column, ...),
+            all of the same length
+        encoding: Codepage for character fields
+
+    Returns:
+        (records, errors): records is a bytes object holding every valid record,
+        errors maps row position -> message for rows that were left out
+    """
+    if len(columns) != len(fields):
+        raise ValueError(f"Got {len(columns)} columns for {len(fields)} fields")
+    n_rows = len(columns[0]) if columns else 0
+    record_length = 1 + sum(f.length for f in fields)
+
+    buffer = np.full((n_rows, record_length), ord(" "), dtype=np.uint8)
+    errors = {}
+    for field, values in zip(fields, columns):
+        values = pd.Series(values).reset_index(drop=True)
+        if field.type == "C":
+            block = _encode_character(field, values, encoding, errors)
+        elif field.type == "D":
+            block = _encode_date(field, values)
+        else:
+            block = _encode_numeric(field, values, errors)
+        buffer[:, field.start:field.start + field.length] = block
+
+    if errors:
+        keep = np.ones(n_rows, dtype=bool)
+        keep[list(errors)] = False
+        buffer = buffer[keep]
+    return buffer.tobytes(), {int(i): errors[i] for i in sorted(errors)}
+
+
+def dbf_header(fields, record_count, update_date=None):
+    """dBase III header as written by the dbf library (version 0x03, no codepage byte)."""
+    update_date = update_date or datetime.date.today()
+    header_length = 32 + 32 * len(fields) + 1
+    record_length = 1 + sum(f.length for f in fields)
+
+    header = bytearray(32)
+    header[0] = 0x03
+    header[1:4] = bytes([update_date.year - 1900, update_date.month, update_date.day])
+    struct.pack_into("<IHH", header, 4, record_count, header_length, record_length)
+
+    for field in fields:
+        descriptor = bytearray(32)
+        descriptor[0:11] = field.name.encode("ascii").ljust(11, b"\x00")
+        descriptor[11] = ord(field.type)
+        struct.pack_into("<I", descriptor, 12, field.start)
+        descriptor[16] = field.length
+        descriptor[17] = field.decimals
+        header += descriptor
+    header += b"\r"
+    return bytes(header)
+
+
+class DbfWriter:
+    """
+    Append records to a dBase III file chunk by chunk.
+
+    The header is written with a record count of 0 and patched on close, so
+    only one chunk of converted values is ever held in memory. When the
+    `with` block raises, the unfinished file is deleted instead.
+
+    Usage:
+        with DbfWriter(path, fields) as writer:
+            for columns in ...:
+                errors = writer.write(columns)
+    """
+
+    def __init__(self, path, fields, encoding="ascii"):
+        self.path = path
+        self.fields = fields
+        self.encoding = encoding
+        self.record_length = 1 + sum(f.length for f in fields)
+        self.record_count = 0
+        self._file = open(path, "wb")
+        self._file.write(dbf_header(fields, 0))
+
+    def write(self, columns):
+        """Encode and append one chunk of converted columns; returns that chunk's errors."""
+        records, errors = encode_records(self.fields, columns, self.encoding)
+        self.write_records(records)
+        return errors
+
+    def write_records(self, records):
+        """Append already encoded fixed-width records."""
+        if len(records) % self.record_length:
+            raise ValueError(f"Record buffer of {len(records)} bytes is not a multiple of "
+                             f"the {self.record_length} byte record length")
+        self._file.write(records)
+        self.record_count += len(records) // self.record_length
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write(b"\x1a")
+        self._file.seek(0)
+        self._file.write(dbf_header(self.fields, self.record_count))
+        self._file.close()
+
+    def abort(self):
+        """Close and delete the unfinished file."""
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_dbf(path, fields, columns, encoding="ascii"):
+    """
+    Write a dBase III file from converted columns in one pass.
+
+    Produces the same bytes as appending the same values row by row with
+    `dbf.Table(path, table_structure)` (default ascii codepage).
+
+    Returns:
+        (record_count, errors) where errors maps row position -> message
+    """
+    with DbfWriter(path, fields, encoding) as writer:
+        errors = writer.write(columns)
+    return writer.record_count, errors
+
+
+def export_chunks(path, fields, chunks, build_columns, encoding="ascii"):
+    """
+    Stream DataFrame chunks into one DBF file with bounded memory.
+
+    Args:
+        path: Output .dbf path
+        fields: List of Field from parse_table_structure
+        chunks: Iterable of DataFrames, e.g. pd.read_sql_query(..., chunksize=50_000)
+        build_columns: Function turning one chunk into the converted column list
+        encoding: Codepage for character fields
+
+    Returns:
+        (record_count, errors) where errors maps source row number -> message
+    """
+    started = time.perf_counter()
+    rows_read = 0
+    all_errors = {}
+
+    with DbfWriter(path, fields, encoding) as writer:
+        for chunk in chunks:
+            errors = writer.write(build_columns(chunk))
+            all_errors.update((rows_read + i, message) for i, message in errors.items())
+            rows_read += len(chunk)
+
+            elapsed = time.perf_counter() - started
+            rate = rows_read / elapsed if elapsed > 0 else 0.0
+            print(f"Exported {writer.record_count:,} records ({rows_read:,} rows read, {rate:,.0f} rows/sec)")
+
+    return writer.record_count, all_errors
+
+
+def _encode_chunk(fields, build_columns, encoding, chunk):
+    """Process-pool worker: convert and encode one chunk; returns (rows, records, errors)."""
+    records, errors = encode_records(fields, build_columns(chunk), encoding)
+    return len(chunk), records, errors
+
+
+def export_parallel(path, fields, chunks, build_columns, encoding="ascii", max_workers=None, ordered=True):
+    """
+    Like export_chunks, but chunks are converted and encoded in worker processes.
+
+    Each worker turns one chunk (partition) into a fixed-width record buffer;
+    the parent only appends the buffers to the file and patches the header
+    with the final record count. At most two chunks per worker are in flight,
+    so memory stays bounded whatever the source size.
+
+    Args:
+        path: Output .dbf path
+        fields: List of Field from parse_table_structure
+        chunks: Iterable of DataFrames
+        build_columns: Picklable function turning one chunk into the converted
+            column list (a module-level function or DbfSchema.convert)
+        encoding: Codepage for character fields
+        max_workers: Number of processes (default: CPU count)
+        ordered: Keep source row order. When False, buffers are appended as
+            soon as any worker finishes.
+
+    Returns:
+        (record_count, errors) where errors maps source row number -> message
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    rows_read = 0
+    rows_done = 0
+    all_errors = {}
+    pending = {}  # future -> first source row number of its chunk
+
+    def collect(future, writer):
+        nonlocal rows_done
+        offset = pending.pop(future)
+        n_rows, records, errors = future.result()
+        writer.write_records(records)
+        all_errors.update((offset + i, message) for i, message in errors.items())
+        rows_done += n_rows
+
+        elapsed = time.perf_counter() - started
+        rate = rows_done / elapsed if elapsed > 0 else 0.0
+        print(f"Exported {writer.record_count:,} records ({rows_done:,} rows converted, {rate:,.0f} rows/sec)")
+
+    with DbfWriter(path, fields, encoding) as writer, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk in chunks:
+            if len(pending) >= 2 * max_workers:
+                if ordered:
+                    collect(next(iter(pending)), writer)
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future, writer)
+            future = executor.submit(_encode_chunk, fields, build_columns, encoding, chunk)
+            pending[future] = rows_read
+            rows_read += len(chunk)
+
+        while pending:
+            if ordered:
+                collect(next(iter(pending)), writer)
+            else:
+                for future in as_completed(list(pending)):
+                    collect(future, writer)
+
+    return writer.record_count, dict(sorted(all_errors.items()))
@@ -0,0 +1,33 @@
+"""
+DRG export layout shared by the Excel and SQL front-ends.
+
+Change a field here and both `ConvertXLSX to DBF` and `sql_to_dbf.py`
+write the new layout.
+"""
+from dbf_writer import DbfSchema
+
+DRG_TABLE_STRUCTURE = (
+    'DOB D; Sex C(1); DateAdm D; TimeAdm C(4); DateDsc D; TimeDsc C(4); Discht C(1); AdmWt N(7,3); Age C(3); AgeDay C(3); '
+    'PDx C(6); SDx1 C(6); SDx2 C(6); SDx3 C(6); SDx4 C(6); SDx5 C(6); SDx6 C(6); SDx7 C(6); SDx8 C(6); '
+    'SDx9 C(6); SDx10 C(6); SDx11 C(6); SDx12 C(6); Proc1 C(7); Proc2 C(7); Proc3 C(7); Proc4 C(7); '
+    'Proc5 C(7); Proc6 C(7); Proc7 C(7); Proc8 C(7); Proc9 C(7); Proc10 C(7); Proc11 C(7); Proc12 C(7); '
+    'Proc13 C(7); Proc14 C(7); Proc15 C(7); Proc16 C(7); Proc17 C(7); Proc18 C(7); Proc19 C(7); Proc20 C(7); '
+    'LeaveDay N(4,0); ActLOS N(3,0); Warn N(4,0); Err N(2,0); DRG C(5); MDC C(2); '
+    'RW N(7,4); WTLOS N(6,2); OT N(4,0); ADJRW N(8,4)'
+)
+
+# Values written when a cell is blank (other text fields are left blank, numbers default to 0)
+DRG_DEFAULTS = {
+    'Sex': 'U',
+    'Discht': 'U',
+    'Age': '000',
+    'AgeDay': '000',
+    'PDx': 'UNK',
+    'DRG': '000',
+    'MDC': '00',
+}
+
+# C(4) fields holding admission/discharge time as HHMM
+DRG_TIME_FIELDS = ('TimeAdm', 'TimeDsc')
+
+DRG_SCHEMA = DbfSchema(DRG_TABLE_STRUCTURE, DRG_DEFAULTS, DRG_TIME_FIELDS)
@@ -0,0 +1,277 @@
+"""
+Bulk-load DataFrames into a database table.
+
+Strategies:
+    executemany: one prepared INSERT sent in explicit batches on the raw DBAPI
+        cursor. On pyodbc, fast_executemany is switched on and string parameter
+        sizes are declared up front, so the driver packs each batch into one
+        array-bound round trip instead of describing every row.
+    bulk_insert: SQL Server only. Rows are written to a CSV staging file in a
+        folder the server can read (a UNC share) and loaded with BULK INSERT.
+    copy: PostgreSQL only. Rows are streamed as CSV through COPY ... FROM STDIN.
+    to_sql: plain DataFrame.to_sql, kept as the baseline.
+
+`pick_strategy` chooses the fastest one the connection's dialect supports.
+"""
+import csv
+import datetime
+import io
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, inspect, text
+
+STRATEGIES = ("executemany", "bulk_insert", "copy", "to_sql")
+
+
+def pick_strategy(dialect_name, staging_dir=None):
+    """Return the preferred strategy for a dialect ('mssql', 'postgresql', 'sqlite', ...)."""
+    if dialect_name == "postgresql":
+        return "copy"
+    if dialect_name == "mssql" and staging_dir:
+        return "bulk_insert"
+    return "executemany"
+
+
+def bulk_load(conn, df, table, schema=None, strategy=None, chunksize=5_000, staging_dir=None):
+    """
+    Append `df` to `table`, creating the table from the frame when it is missing.
+
+    Args:
+        conn: SQLAlchemy connection; rows are loaded in its transaction
+            (bulk_insert reads the staging file server-side, still inside it)
+        df: Rows to append; column names must match the table
+        table: Target table name
+        schema: Optional schema of the target table
+        strategy: One of STRATEGIES, or None to pick by dialect
+        chunksize: Rows per executemany batch
+        staging_dir: Folder for bulk_insert staging files, visible to the
+            database server under the same path
+
+    Returns:
+        Number of rows loaded
+    """
+    strategy = strategy or pick_strategy(conn.dialect.name, staging_dir)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy!r} (use one of {', '.join(STRATEGIES)})")
+    if df.empty:
+        return 0
+
+    if strategy == "to_sql":
+        df.to_sql(table, conn, schema=schema, if_exists="append", index=False, chunksize=chunksize)
+        return len(df)
+
+    if not inspect(conn).has_table(table, schema=schema):
+        df.head(0).to_sql(table, conn, schema=schema, index=False)
+
+    if strategy == "executemany":
+        _load_executemany(conn, df, table, schema, chunksize)
+    elif strategy == "bulk_insert":
+        if conn.dialect.name != "mssql" or not staging_dir:
+            raise ValueError("bulk_insert needs SQL Server and a staging_dir the server can read")
+        _load_bulk_insert(conn, df, table, schema, staging_dir)
+    else:
+        if conn.dialect.name != "postgresql":
+            raise ValueError(f"copy is not supported on {conn.dialect.name}")
+        _load_copy(conn, df, table, schema)
+    return len(df)
+
+
+def _qualified(conn, table, schema):
+    quote = conn.dialect.identifier_preparer.quote
+    return f"{quote(schema)}.{quote(table)}" if schema else quote(table)
+
+
+def _python_columns(df, temporal_as_text=False):
+    """Column lists of plain Python values (None for missing); DBAPI drivers reject numpy scalars."""
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        missing = series.isna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = list(series.dt.to_pydatetime())
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy().tolist()
+        else:
+            values = series.tolist()
+
+        if missing.any():
+            values = [None if m else v for v, m in zip(values, missing)]
+        if temporal_as_text:
+            values = [_sqlite_text(v) for v in values]
+        columns.append(values)
+    return columns
+
+
+def _sqlite_text(value):
+    """Store temporal values as text in the same layout SQLAlchemy's SQLite types use."""
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, datetime.date):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, datetime.time):
+        return value.strftime("%H:%M:%S.%f")
+    return value
+
+
+def _load_executemany(conn, df, table, schema, chunksize):
+    quote = conn.dialect.identifier_preparer.quote
+    names = ", ".join(quote(c) for c in df.columns)
+    placeholders = ", ".join(["?"] * len(df.columns)) if conn.dialect.paramstyle == "qmark" \
+        else ", ".join(["%s"] * len(df.columns))
+    sql = f"INSERT INTO {_qualified(conn, table, schema)} ({names}) VALUES ({placeholders})"
+
+    # sqlite3 cannot bind datetime.time and its date adapters are deprecated
+    columns = _python_columns(df, temporal_as_text=conn.dialect.name == "sqlite")
+    rows = list(zip(*columns))
+
+    cursor = conn.connection.cursor()
+    try:
+        if conn.dialect.driver == "pyodbc":
+            import pyodbc
+
+            cursor.fast_executemany = True
+            # Declare string widths once; otherwise pyodbc re-describes them per batch
+            sizes = []
+            for name, values in zip(df.columns, columns):
+                # pandas 3 keeps text in the str dtype, older versions in object columns
+                is_text = pd.api.types.is_string_dtype(df[name]) or pd.api.types.is_object_dtype(df[name])
+                if is_text and any(isinstance(v, str) for v in values):
+                    width = max(len(v) for v in values if isinstance(v, str))
+                    sizes.append((pyodbc.SQL_WVARCHAR, max(width, 1), 0))
+                else:
+                    sizes.append(None)
+            cursor.setinputsizes(sizes)
+
+        for start in range(0, len(rows), chunksize):
+            cursor.executemany(sql, rows[start:start + chunksize])
+    finally:
+        cursor.close()
+
+
+def _write_csv(df, f):
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerows(zip(*_python_columns(df)))
+
+
+def _table_order(conn, df, table, schema):
+    """
+    `df` with its columns in the table's column order; table columns the frame
+    lacks are left empty (NULL). Names match case-insensitively, like SQL Server.
+
+    Raises:
+        ValueError: when the frame has a column the table does not
+    """
+    # Reflection reads INFORMATION_SCHEMA.COLUMNS (tempdb's for #temp tables) in ordinal order
+    target = [c["name"] for c in inspect(conn).get_columns(table, schema=schema)]
+    by_name = {str(c).lower(): c for c in df.columns}
+    extra = set(by_name) - {c.lower() for c in target}
+    if extra:
+        raise ValueError(f"Table {table} has no column(s) {sorted(extra)}")
+    return pd.DataFrame({c: df[by_name[c.lower()]] if c.lower() in by_name else None for c in target},
+                        index=df.index)
+
+
+def _load_bulk_insert(conn, df, table, schema, staging_dir):
+    # BULK INSERT maps CSV fields to table columns by position, not by name
+    df = _table_order(conn, df, table, schema)
+    path = os.path.join(staging_dir, f"{table}_{uuid.uuid4().hex}.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        _write_csv(df, f)
+    try:
+        conn.execute(text(
+            f"BULK INSERT {_qualified(conn, table, schema)} FROM '{path}' "
+            "WITH (FORMAT = 'CSV', CODEPAGE = '65001', ROWTERMINATOR = '0x0a', TABLOCK)"
+        ))
+    finally:
+        os.remove(path)
+
+
+def _load_copy(conn, df, table, schema):
+    quote = conn.dialect.identifier_preparer.quote
+    names = ", ".join(quote(c) for c in df.columns)
+    sql = f"COPY {_qualified(conn, table, schema)} ({names}) FROM STDIN WITH (FORMAT csv)"
+
+    buffer = io.StringIO()
+    _write_csv(df, buffer)
+    buffer.seek(0)
+
+    cursor = conn.connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+# --------------------------- Benchmark ---------------------------
+
+def make_synthetic_med_stat(n_rows, seed=0):
+    """Rows shaped like df_total in transform_insert_sql.py."""
+    rng = np.random.default_rng(seed)
+    new_date = pd.Timestamp("2024-05-01") + pd.to_timedelta(rng.integers(0, 31, n_rows), unit="D")
+    return pd.DataFrame({
+        "MK": rng.choice(["A", "B", "C"], n_rows),
+        "HN": rng.integers(10_000_000, 99_999_999, n_rows).astype(str),
+        "CaseNo": rng.integers(1, 10 ** 9, n_rows),
+        "Med_Number": rng.integers(1_000_000, 9_999_999, n_rows),
+        "Med_Description": rng.choice(["PARACETAMOL 500 MG TAB", "AMOXICILLIN 500 MG CAP", "NSS 0.9% 1000 ML"], n_rows),
+        "OrderID": rng.integers(1, 10 ** 9, n_rows),
+        "Department": rng.choice(["OPD1", "OPD2", "ER", "ICU"], n_rows),
+        "Clinic_Ward": rng.choice(["MED", "SUR", "PED", None], n_rows),
+        "New_Date": new_date.date,
+        "New_Time": [datetime.time(h, m) for h, m in zip(rng.integers(0, 24, n_rows), rng.integers(0, 60, n_rows))],
+        "Sum of New_to_Final_minutes": np.where(rng.random(n_rows) < 0.1, np.nan, rng.random(n_rows) * 120),
+        "Summary_Interval": rng.integers(0, 3600, n_rows),
+        "is_excluded": rng.integers(0, 2, n_rows),
+    })
+
+
+def benchmark(n_rows=100_000, url=None, chunksize=5_000, staging_dir=None):
+    """
+    Time every strategy the database supports on a fresh table.
+
+    Args:
+        n_rows: Rows to load per strategy
+        url: SQLAlchemy URL of the target database (default: a temporary SQLite file)
+        chunksize: Rows per batch
+        staging_dir: Folder the database server can read, needed to time
+            bulk_insert on SQL Server
+    """
+    df = make_synthetic_med_stat(n_rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(url or f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"{n_rows:,} rows into {engine.dialect.name} (preferred strategy: "
+              f"{pick_strategy(engine.dialect.name, staging_dir)})")
+        print(f"{'strategy':<14}{'seconds':>10}{'rows/sec':>14}")
+
+        for strategy in STRATEGIES:
+            table = f"bench_{strategy}"
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+                    df.head(0).to_sql(table, conn, index=False)
+                    started = time.perf_counter()
+                    bulk_load(conn, df, table, strategy=strategy, chunksize=chunksize, staging_dir=staging_dir)
+                    elapsed = time.perf_counter() - started
+                    conn.execute(text(f"DROP TABLE {table}"))
+            except ValueError as e:
+                print(f"{strategy:<14}{'skipped':>10}  ({e})")
+                continue
+            print(f"{strategy:<14}{elapsed:>10.2f}{n_rows / elapsed:>14,.0f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    # python bulk_loader.py [rows] [sqlalchemy-url] [staging-dir]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000, sys.argv[2] if len(sys.argv) > 2 else None,
+              staging_dir=sys.argv[3] if len(sys.argv) > 3 else None)
@@ -0,0 +1,244 @@
+"""
+Refresh Excel workbooks (data connections / Power Query) in worker processes.
+
+Every refresh runs in its own `python excel_refresh.py --worker ...` process,
+so a hung refresh is killed after a hard timeout (together with the Excel
+instance it started) instead of blocking the pipeline, and several workbooks
+can refresh at once. Workbooks whose source data fingerprint matches the one
+recorded after their last successful refresh are skipped.
+
+The backend doing the actual refresh is swappable: "com" drives Excel through
+pywin32 (Windows only), "fake" just sleeps and touches the file so the
+scheduling, timeout and skip logic can be exercised anywhere.
+
+Usage:
+    results = refresh_workbooks([path], backend="com", timeout=900,
+                                fingerprints={path: files_fingerprint(sources)},
+                                state_path="refresh_state.json")
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def com_refresh(path, pid_file=None):
+    """Open the workbook in a private Excel instance, RefreshAll, wait for queries and save."""
+    import pythoncom
+    import win32com.client
+    import win32process
+
+    pythoncom.CoInitialize()
+    excel = None
+    workbook = None
+    try:
+        # DispatchEx: own EXCEL.EXE per worker, so parallel refreshes do not share one instance
+        excel = win32com.client.DispatchEx("Excel.Application")
+        if pid_file:
+            _, pid = win32process.GetWindowThreadProcessId(excel.Hwnd)
+            with open(pid_file, "w") as f:
+                f.write(str(pid))
+        excel.Visible = False
+        excel.DisplayAlerts = False
+        excel.AskToUpdateLinks = False
+        excel.UserControl = False
+
+        workbook = excel.Workbooks.Open(os.path.abspath(path))
+        workbook.RefreshAll()
+        excel.CalculateUntilAsyncQueriesDone()
+        workbook.Save()
+    finally:
+        if workbook is not None:
+            workbook.Close(False)
+        if excel is not None:
+            excel.Quit()
+        pythoncom.CoUninitialize()
+
+
+def fake_refresh(path, pid_file=None, seconds=0.0, fail=False):
+    """Stand-in for com_refresh: wait `seconds`, then fail or touch the file."""
+    time.sleep(seconds)
+    if fail:
+        raise RuntimeError(f"fake refresh failed for {path}")
+    os.utime(path)
+
+
+BACKENDS = {"com": com_refresh, "fake": fake_refresh}
+
+
+def files_fingerprint(paths):
+    """Fingerprint of source files from their path, size and modification time."""
+    digest = hashlib.sha256()
+    for path in sorted(os.path.abspath(p) for p in paths):
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+        except FileNotFoundError:
+            digest.update(f"{path}|missing\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_state(state_path):
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(state_path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, state_path)
+
+
+def _kill(pid):
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True)
+        else:
+            os.kill(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def refresh_workbooks(paths, backend="com", timeout=900, max_workers=2, fingerprints=None, state_path=None,
+                      backend_options=None, poll_interval=0.2):
+    """
+    Refresh workbooks in worker processes with a hard timeout.
+
+    Args:
+        paths: Workbook paths
+        backend: Name in BACKENDS ("com" or "fake")
+        timeout: Seconds a single refresh may take before its worker and
+            Excel instance are killed
+        max_workers: Refreshes running at the same time
+        fingerprints: Optional {path: fingerprint of that workbook's source data}.
+            A workbook is skipped when its fingerprint equals the one stored
+            in `state_path` after its last successful refresh.
+        state_path: JSON file recording fingerprints of successful refreshes
+        backend_options: Extra keyword arguments for the backend (e.g. fake's seconds)
+        poll_interval: Seconds between checks on the running workers
+
+    Returns:
+        List of dicts (file, status, duration, error) in `paths` order, where
+        status is "refreshed", "skipped", "timeout" or "error"
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend!r} (use {', '.join(BACKENDS)})")
+    fingerprints = fingerprints or {}
+    state = load_state(state_path) if state_path else {}
+
+    results = {}
+    queue = []
+    for path in paths:
+        key = os.path.abspath(path)
+        fingerprint = fingerprints.get(path)
+        if fingerprint is not None and state.get(key) == fingerprint:
+            results[path] = {"file": path, "status": "skipped", "duration": 0.0, "error": None}
+            logging.info(f"Refresh skipped, source data unchanged: {path}")
+        else:
+            queue.append(path)
+
+    running = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        while queue or running:
+            while queue and len(running) < max_workers:
+                path = queue.pop(0)
+                pid_file = os.path.join(tmp, f"{len(results) + len(running)}.pid")
+                stderr = tempfile.TemporaryFile(dir=tmp)
+                command = [sys.executable, os.path.abspath(__file__), "--worker", backend, path,
+                           "--pid-file", pid_file, "--options", json.dumps(backend_options or {})]
+                logging.info(f"Processing Refresh: {os.path.abspath(path)}")
+                running[path] = (subprocess.Popen(command, stderr=stderr), time.monotonic(), pid_file, stderr)
+
+            for path, (process, started, pid_file, stderr) in list(running.items()):
+                elapsed = time.monotonic() - started
+                code = process.poll()
+                if code is None and elapsed < timeout:
+                    continue
+
+                result = {"file": path, "status": "refreshed", "duration": elapsed, "error": None}
+                if code is None:
+                    process.kill()
+                    process.wait()
+                    if os.path.exists(pid_file):
+                        with open(pid_file) as f:
+                            pid = f.read().strip()
+                        if pid.isdigit() and int(pid) > 0:
+                            _kill(int(pid))  # the Excel instance outlives its killed worker
+                    result.update(status="timeout", error=f"no result after {timeout}s, killed")
+                    logging.error(f"Refresh timed out after {timeout}s: {path}")
+                elif code != 0:
+                    stderr.seek(0)
+                    lines = stderr.read().decode("utf-8", "replace").strip().splitlines()
+                    result.update(status="error", error=lines[-1] if lines else f"exit code {code}")
+                    logging.error(f"Refresh failed: {path}: {result['error']}")
+                else:
+                    logging.info(f"Refresh Complete! {path} ({elapsed:.1f}s)")
+                    if fingerprints.get(path) is not None:
+                        state[os.path.abspath(path)] = fingerprints[path]
+                stderr.close()
+                results[path] = result
+                del running[path]
+
+            if running:
+                time.sleep(poll_interval)
+
+    if state_path:
+        try:
+            save_state(state_path, state)
+        except OSError as e:
+            # Only costs a refresh that could have been skipped next time
+            logging.warning(f"Refresh state not saved to {state_path}: {e}")
+    return [results[path] for path in paths]
+
+
+def demo():
+    """Exercise concurrency, timeout and skip with the fake backend."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    with tempfile.TemporaryDirectory() as tmp:
+        books = []
+        for name in ("a.xlsx", "b.xlsx", "c.xlsx"):
+            books.append(os.path.join(tmp, name))
+            open(books[-1], "wb").close()
+        source = os.path.join(tmp, "source.csv")
+        open(source, "w").close()
+        fingerprints = {path: files_fingerprint([source]) for path in books}
+        state_path = os.path.join(tmp, "state.json")
+
+        started = time.monotonic()
+        first = refresh_workbooks(books, backend="fake", timeout=5, max_workers=3, fingerprints=fingerprints,
+                                  state_path=state_path, backend_options={"seconds": 1})
+        print(f"first run ({time.monotonic() - started:.1f}s):", [r["status"] for r in first])
+
+        second = refresh_workbooks(books, backend="fake", fingerprints=fingerprints, state_path=state_path)
+        print("unchanged source:", [r["status"] for r in second])
+
+        slow = refresh_workbooks(books[:1], backend="fake", timeout=1, backend_options={"seconds": 30})
+        print("hung refresh:", [(r["status"], round(r["duration"], 1)) for r in slow])
+
+
+def _worker(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--worker", choices=sorted(BACKENDS), required=True)
+    parser.add_argument("path")
+    parser.add_argument("--pid-file")
+    parser.add_argument("--options", default="{}")
+    args = parser.parse_args(argv)
+    BACKENDS[args.worker](args.path, pid_file=args.pid_file, **json.loads(args.options))
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        _worker(sys.argv[1:])
+    else:
+        demo()
@@ -0,0 +1,193 @@
+import logging
+
+import pandas as pd
+from sqlalchemy import bindparam, create_engine, inspect, text
+from sqlalchemy.types import BigInteger, String
+
+from bulk_loader import bulk_load
+
+# Columns added to the target table so runs can be compared without reading the data back
+KEY_COLUMN = "Row_Key"
+HASH_COLUMN = "Row_Hash"
+
+
+def add_row_keys(df, key_columns):
+    """
+    Return a copy of `df` with a stable row key and a content hash.
+
+    Args:
+        df: Rows to load
+        key_columns: Columns identifying a row, e.g. ["CaseNo", "New_Date", "OrderID"]
+
+    Returns:
+        DataFrame with "Row_Key" (key values joined by '|') and "Row_Hash"
+        (64-bit hash of every other column) appended. Rows repeating a key
+        get their occurrence number appended ('...|#1', '...|#2'), so the key
+        stays unique as long as the rows keep their order between runs.
+    """
+    df = df.drop(columns=[KEY_COLUMN, HASH_COLUMN], errors="ignore").copy()
+
+    keys = df[key_columns].astype(str).agg("|".join, axis=1)
+    repeat = keys.groupby(keys, sort=False).cumcount()
+    if (repeat > 0).any():
+        logging.warning(f"Row key {key_columns} repeats on {int((repeat > 0).sum())} rows; "
+                        f"numbering the repeats")
+        keys = keys.where(repeat == 0, keys + "|#" + repeat.astype(str))
+
+    value_columns = [c for c in df.columns if c not in key_columns]
+    hashes = pd.util.hash_pandas_object(df[value_columns].astype(str), index=False)
+
+    df[KEY_COLUMN] = keys.values
+    df[HASH_COLUMN] = hashes.values.view("int64")  # signed so every database can store it
+    return df
+
+
+def ensure_key_columns(conn, table, schema=None):
+    """Add Row_Key / Row_Hash to an existing table that predates incremental loads."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table, schema=schema)}
+    target = _qualified(conn, table, schema)
+    quote = conn.dialect.identifier_preparer.quote
+
+    for name, column_type in ((KEY_COLUMN, String(450)), (HASH_COLUMN, BigInteger())):
+        if name not in existing:
+            type_sql = column_type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {target} ADD {quote(name)} {type_sql} NULL"))
+
+
+def upsert_table(conn, df, table, key_columns, schema=None, delete_missing=True, chunksize=10_000,
+                 strategy=None, staging_dir=None):
+    """
+    Bring `table` in line with `df` by sending only new and changed rows.
+
+    The target's current keys and hashes are read first. Rows that are new
+    or whose hash changed are bulk-loaded into a staging table and merged
+    into the target (MERGE on SQL Server, delete + insert elsewhere, e.g.
+    SQLite). Keys missing from `df` are deleted when `delete_missing` is set.
+    Run it inside `engine.begin()` so the whole sync commits or rolls back
+    together; readers never see an empty table. The staging table is a
+    session temp table, so jobs running at the same time cannot overwrite
+    each other's staged rows.
+
+    Args:
+        conn: SQLAlchemy connection
+        df: Full set of rows the table should hold
+        table: Target table name
+        key_columns: Columns identifying a row
+        schema: Optional schema of the target table
+        delete_missing: Delete target rows whose key is not in `df`
+        chunksize: Rows per batch when staging
+        strategy: bulk_loader strategy for the staging table (None picks by dialect)
+        staging_dir: Folder for bulk_insert staging files (see bulk_loader)
+
+    Returns:
+        dict with "inserted", "updated", "deleted" and "unchanged" counts
+    """
+    ensure_key_columns(conn, table, schema)
+    df = add_row_keys(df, key_columns)
+
+    quote = conn.dialect.identifier_preparer.quote
+    target = _qualified(conn, table, schema)
+    existing = pd.read_sql(text(f"SELECT {quote(KEY_COLUMN)}, {quote(HASH_COLUMN)} FROM {target}"), conn)
+    existing_hash = existing.dropna(subset=[KEY_COLUMN]).set_index(KEY_COLUMN)[HASH_COLUMN]
+
+    old_hash = df[KEY_COLUMN].map(existing_hash)
+    is_new = old_hash.isna()
+    is_changed = ~is_new & (old_hash != df[HASH_COLUMN])
+    staged = df[is_new | is_changed]
+
+    counts = {
+        "inserted": int(is_new.sum()),
+        "updated": int(is_changed.sum()),
+        "deleted": 0,
+        "unchanged": int(len(df) - len(staged)),
+    }
+
+    if not staged.empty:
+        stage = _create_temp_stage(conn, target, table)
+        try:
+            bulk_load(conn, staged, stage, None, strategy, chunksize, staging_dir)
+            _merge_stage(conn, target, _qualified(conn, stage, None), list(staged.columns))
+        finally:
+            conn.execute(text(f"DROP TABLE {_qualified(conn, stage, None)}"))
+
+    if delete_missing:
+        gone = existing[~existing[KEY_COLUMN].isin(df[KEY_COLUMN])]
+        counts["deleted"] = len(gone)
+        keys = gone[KEY_COLUMN].dropna().tolist()
+        for start in range(0, len(keys), 1000):
+            conn.execute(text(f"DELETE FROM {target} WHERE {quote(KEY_COLUMN)} IN :keys")
+                         .bindparams(bindparam("keys", expanding=True)),
+                         {"keys": keys[start:start + 1000]})
+        if gone[KEY_COLUMN].isna().any():
+            # Rows written before the key columns existed
+            conn.execute(text(f"DELETE FROM {target} WHERE {quote(KEY_COLUMN)} IS NULL"))
+
+    return counts
+
+
+def _create_temp_stage(conn, target, table):
+    """
+    Create an empty temp copy of the target's columns, visible only to this connection; returns its name.
+
+    The column types come from the target (DATE, TIME, NVARCHAR, Row_Key/Row_Hash), not from
+    the frame, so the merge needs no implicit conversions and Thai text stays Unicode.
+    """
+    if conn.dialect.name == "mssql":
+        stage = f"#{table}_stage"  # '#' makes it a session temp table in tempdb
+        conn.execute(text(f"SELECT TOP 0 * INTO {_qualified(conn, stage, None)} FROM {target}"))
+    else:
+        stage = f"{table}_stage"
+        conn.execute(text(f"CREATE TEMPORARY TABLE {_qualified(conn, stage, None)} AS SELECT * FROM {target} WHERE 0 = 1"))
+    return stage
+
+
+def _qualified(conn, table, schema):
+    quote = conn.dialect.identifier_preparer.quote
+    return f"{quote(schema)}.{quote(table)}" if schema else quote(table)
+
+
+def _merge_stage(conn, target, stage, columns):
+    quote = conn.dialect.identifier_preparer.quote
+    names = [quote(c) for c in columns]
+    key = quote(KEY_COLUMN)
+
+    if conn.dialect.name == "mssql":
+        updates = ", ".join(f"target.{n} = source.{n}" for n in names if n != key)
+        conn.execute(text(
+            f"MERGE {target} AS target USING {stage} AS source ON target.{key} = source.{key} "
+            f"WHEN MATCHED THEN UPDATE SET {updates} "
+            f"WHEN NOT MATCHED BY TARGET THEN INSERT ({', '.join(names)}) "
+            f"VALUES ({', '.join('source.' + n for n in names)});"
+        ))
+    else:
+        conn.execute(text(f"DELETE FROM {target} WHERE {key} IN (SELECT {key} FROM {stage})"))
+        conn.execute(text(f"INSERT INTO {target} ({', '.join(names)}) SELECT {', '.join(names)} FROM {stage}"))
+
+
+def demo():
+    """Run three loads against an in-memory SQLite table and print the counts."""
+    engine = create_engine("sqlite://")
+    key_columns = ["CaseNo", "New_Date", "OrderID"]
+    df = pd.DataFrame({
+        "CaseNo": [1, 2, 3, 4],
+        "New_Date": pd.to_datetime(["2024-05-01", "2024-05-01", "2024-05-02", "2024-05-03"]).date,
+        "OrderID": [10, 11, 12, 13],
+        "Summary_Interval": [300, 420, 60, 900],
+        "is_excluded": [0, 0, 1, 0],
+    })
+
+    with engine.begin() as conn:
+        df.head(0).to_sql("med_stat", conn, index=False)
+        print("first load:", upsert_table(conn, df, "med_stat", key_columns))
+
+    changed = df.drop(index=0).copy()
+    changed.loc[1, "Summary_Interval"] = 480
+    changed.loc[len(df)] = [5, df["New_Date"][0], 14, 120, 0]
+    with engine.begin() as conn:
+        print("second load:", upsert_table(conn, changed, "med_stat", key_columns))
+        print("re-run:", upsert_table(conn, changed, "med_stat", key_columns))
+        print(pd.read_sql(text("SELECT * FROM med_stat ORDER BY CaseNo"), conn))
+
+
+if __name__ == "__main__":
+    demo()
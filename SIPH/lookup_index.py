@@ -0,0 +1,141 @@
+import glob
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class LookupIndex:
+    """
+    Map composite keys to the rows of a lookup table without building key strings.
+
+    Every key part is stored as a level of distinct texts, and a row's key is
+    the integer combining its level positions. Looking keys up factorizes each
+    part of the query, converts only the distinct values to text, and finds
+    the matching rows with one `Index.get_indexer` call on the integer keys.
+    Duplicate keys keep their first row, like `drop_duplicates(keep='first')`.
+
+    Usage:
+        index = LookupIndex.from_joined_key(df1, 'key', ['Material Description', 'type'])
+        found = index.lookup(df['Med_Number'], df['Department'])
+    """
+
+    def __init__(self, key_parts, values):
+        """
+        Args:
+            key_parts: One Series of key text per key part, aligned with `values`
+            values: DataFrame of the columns to return for each key
+        """
+        self.levels = []
+        codes = []
+        for part in key_parts:
+            part_codes, uniques = pd.factorize(pd.Series(part).reset_index(drop=True).astype(str))
+            self.levels.append(pd.Index(uniques))
+            codes.append(part_codes)
+
+        keys = self._combine(codes)
+        first = ~pd.Index(keys).duplicated(keep="first")
+        self.keys = pd.Index(keys[first])
+        self.values = values.reset_index(drop=True)[first].reset_index(drop=True)
+        self.fingerprint = None
+
+    @classmethod
+    def from_columns(cls, df, key_columns, value_columns):
+        """Index `df` on one or more key columns."""
+        df = df.dropna(subset=key_columns)
+        return cls([df[c] for c in key_columns], df[value_columns])
+
+    @classmethod
+    def from_joined_key(cls, df, key_column, value_columns, parts=2, sep="_"):
+        """Index `df` on a text key joining `parts` values with `sep`, e.g. '1042_OPD1'."""
+        df = df.dropna(subset=[key_column])
+        split = df[key_column].astype(str).str.split(sep, n=parts - 1, expand=True)
+        if split.shape[1] < parts:
+            split = split.reindex(columns=range(parts))
+        valid = split.notna().all(axis=1)
+        return cls([split.loc[valid, i] for i in range(parts)], df.loc[valid, value_columns])
+
+    def _combine(self, codes):
+        keys = np.zeros(len(codes[0]), dtype="int64")
+        missing = np.zeros(len(codes[0]), dtype=bool)
+        for level, part_codes in zip(self.levels, codes):
+            keys = keys * (len(level) + 1) + part_codes
+            missing |= part_codes < 0
+        keys[missing] = -1
+        return keys
+
+    def positions(self, *key_parts):
+        """Row position in `values` for every key, -1 where there is no match."""
+        if len(key_parts) != len(self.levels):
+            raise ValueError(f"Expected {len(self.levels)} key parts, got {len(key_parts)}")
+
+        codes = []
+        for level, part in zip(self.levels, key_parts):
+            part_codes, uniques = pd.factorize(part)
+            level_positions = level.get_indexer(pd.Index(uniques).astype(str))
+            codes.append(np.where(part_codes < 0, -1, level_positions[part_codes]))
+
+        keys = self._combine(codes)
+        found = self.keys.get_indexer(keys)
+        found[keys < 0] = -1
+        return found
+
+    def lookup(self, *key_parts):
+        """Lookup columns for every key (NaN where missing), indexed like `key_parts[0]`."""
+        found = self.values.reindex(self.positions(*key_parts))
+        found.index = key_parts[0].index
+        return found
+
+    @classmethod
+    def cached(cls, cache_dir, name, df, build, *args, **kwargs):
+        """
+        Build `cls.<build>(df, *args, **kwargs)` or load it from `cache_dir`.
+
+        The cache entry is keyed by a fingerprint of the lookup sheet content
+        and the build arguments, so it is rebuilt as soon as the sheet changes.
+        Levels and keys are kept as plain NumPy arrays (loaded without pickle)
+        and the values as Parquet; any cache error just rebuilds the index.
+        """
+        fingerprint = _fingerprint(df, build, args, kwargs)
+        stem = os.path.join(cache_dir, f"{name}.{fingerprint[:16]}.lookup")
+        try:
+            with np.load(stem + ".npz", allow_pickle=False) as arrays:
+                if str(arrays["fingerprint"]) == fingerprint:
+                    index = cls.__new__(cls)
+                    index.levels = [pd.Index(arrays[f"level_{i}"].astype(object)) for i in range(int(arrays["parts"]))]
+                    index.keys = pd.Index(arrays["keys"])
+                    index.values = pd.read_parquet(stem + ".parquet")
+                    index.fingerprint = fingerprint
+                    return index
+        except Exception as e:
+            if not isinstance(e, FileNotFoundError):
+                logging.warning(f"Warning: lookup cache {name} not used: {e}")
+
+        index = getattr(cls, build)(df, *args, **kwargs)
+        index.fingerprint = fingerprint
+        try:
+            index._save(cache_dir, name, stem)
+        except Exception as e:
+            logging.warning(f"Warning: lookup cache {name} not saved: {e}")
+        return index
+
+    def _save(self, cache_dir, name, stem):
+        os.makedirs(cache_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(glob.escape(cache_dir), f"{glob.escape(name)}.*.lookup.*")):
+            os.remove(old)
+        # Values first: the .npz is only written, and so only found, once both parts exist
+        self.values.to_parquet(stem + ".parquet.tmp", index=False)
+        os.replace(stem + ".parquet.tmp", stem + ".parquet")
+        levels = {f"level_{i}": np.array(list(level), dtype=str) for i, level in enumerate(self.levels)}
+        with open(stem + ".npz.tmp", "wb") as f:
+            np.savez(f, fingerprint=np.array(self.fingerprint), parts=np.array(len(self.levels)),
+                     keys=np.asarray(self.keys, dtype="int64"), **levels)
+        os.replace(stem + ".npz.tmp", stem + ".npz")
+
+
+def _fingerprint(df, build, args, kwargs):
+    digest = hashlib.sha256(repr((build, list(df.columns), args, sorted(kwargs.items()))).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df.astype(str), index=False).values.tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,175 @@
+import time as timer
+
+import numpy as np
+import pandas as pd
+
+
+def _bucket_starts(in_times, out_times, freq):
+    """Return the bucket grid: every `freq` step of every day seen in the data."""
+    days = pd.concat([in_times.dt.normalize(), out_times.dt.normalize()]).dropna().unique()
+    days = np.sort(days.astype("datetime64[ns]"))
+    if len(days) == 0:
+        return np.array([], dtype="datetime64[ns]")
+
+    step = pd.Timedelta(freq)
+    if step <= pd.Timedelta(0) or pd.Timedelta(days=1) % step != pd.Timedelta(0):
+        raise ValueError(f"freq must divide one day evenly, got {freq!r}")
+
+    offsets = np.arange(0, pd.Timedelta(days=1).value, step.value, dtype="int64").astype("timedelta64[ns]")
+    return (days[:, None] + offsets[None, :]).ravel()
+
+
+def _count_per_bucket(in_times, out_times, starts, step):
+    """Count entries, exits and cars inside for each bucket with searchsorted."""
+    ins = in_times[~np.isnat(in_times)]
+    outs = out_times[~np.isnat(out_times)]
+    ins.sort()
+    outs.sort()
+    ends = starts + step
+
+    cars_in = np.searchsorted(ins, ends, side="left") - np.searchsorted(ins, starts, side="left")
+    cars_out = np.searchsorted(outs, ends, side="left") - np.searchsorted(outs, starts, side="left")
+
+    # A car is inside at `start` when in <= start < out. Only rows with out > in
+    # can ever satisfy that, and for them "in <= start" minus "out <= start"
+    # is exactly the number still parked.
+    stays = ~np.isnat(in_times) & ~np.isnat(out_times) & (out_times > in_times)
+    stay_in = np.sort(in_times[stays])
+    stay_out = np.sort(out_times[stays])
+    cars_inside = np.searchsorted(stay_in, starts, side="right") - np.searchsorted(stay_out, starts, side="right")
+
+    return cars_in, cars_out, cars_inside
+
+
+def occupancy(df, in_col="In Access Date/Time", out_col="Out Access Date/Time", freq="1h", by=None):
+    """
+    Count cars in / out / inside per time bucket with a sorted sweep.
+
+    Produces the same numbers as looping over every (date, hour) and masking
+    the whole frame, but sorts the entry and exit times once and looks every
+    bucket edge up with `searchsorted`, so the cost is O(n log n).
+
+    Args:
+        df: DataFrame with entry and exit datetime columns
+        in_col: Name of the entry datetime column
+        out_col: Name of the exit datetime column
+        freq: Bucket size that divides a day, e.g. "15min", "1h", "1D"
+        by: Optional column name or list of names to count per group (e.g. "Card Type")
+
+    Returns:
+        DataFrame with the group keys, "date", "hour" (when freq < 1 day),
+        "minute" (when freq < 1 hour), "cars_in", "cars_out" and "cars_inside".
+        "cars_inside" is the number of cars parked at the start of the bucket.
+    """
+    in_times = pd.to_datetime(df[in_col])
+    out_times = pd.to_datetime(df[out_col])
+    step = pd.Timedelta(freq)
+    starts = _bucket_starts(in_times, out_times, freq)
+
+    if by is None:
+        groups = [((), df.index)]
+        by = []
+    else:
+        by = [by] if isinstance(by, str) else list(by)
+        groups = [
+            (key if isinstance(key, tuple) else (key,), group.index)
+            for key, group in df[by].groupby(by, sort=True)
+        ]
+
+    frames = []
+    for key, index in groups:
+        group_in = in_times.loc[index].to_numpy(dtype="datetime64[ns]")
+        group_out = out_times.loc[index].to_numpy(dtype="datetime64[ns]")
+        cars_in, cars_out, cars_inside = _count_per_bucket(group_in, group_out, starts, step.to_timedelta64())
+
+        bucket = pd.DatetimeIndex(starts)
+        frame = pd.DataFrame({name: value for name, value in zip(by, key)}, index=range(len(starts)))
+        frame["date"] = bucket.date
+        if step < pd.Timedelta(days=1):
+            frame["hour"] = bucket.hour.astype("int64")
+        if step < pd.Timedelta(hours=1):
+            frame["minute"] = bucket.minute.astype("int64")
+        frame["cars_in"] = cars_in
+        frame["cars_out"] = cars_out
+        frame["cars_inside"] = cars_inside
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=by + ["date", "hour", "cars_in", "cars_out", "cars_inside"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def occupancy_loop(df, in_col="In Access Date/Time", out_col="Out Access Date/Time"):
+    """Reference implementation: the original per-(date, hour) mask scan from Jowit."""
+    dates = pd.concat([df[in_col].dt.date, df[out_col].dt.date]).unique()
+
+    results = []
+    for d in sorted(dates):
+        for hour in range(24):
+            start = pd.Timestamp(f"{d} {hour:02d}:00")
+            end = start + pd.Timedelta(hours=1)
+
+            cars_in = ((df[in_col] >= start) & (df[in_col] < end)).sum()
+            cars_out = ((df[out_col] >= start) & (df[out_col] < end)).sum()
+            cars_inside = ((df[in_col] <= start) & (df[out_col] > start)).sum()
+
+            results.append({
+                "date": d,
+                "hour": hour,
+                "cars_in": cars_in,
+                "cars_out": cars_out,
+                "cars_inside": cars_inside
+            })
+
+    return pd.DataFrame(results)
+
+
+def make_synthetic_parking(n_rows, days=30, seed=0):
+    """Generate random parking-gate rows spread over `days` days."""
+    rng = np.random.default_rng(seed)
+    origin = np.datetime64("2025-01-01T00:00:00", "s")
+    entry = origin + rng.integers(0, days * 86400, n_rows).astype("timedelta64[s]")
+    stay = rng.exponential(3 * 3600, n_rows).astype("int64").astype("timedelta64[s]")
+    card_types = np.array(["Visitor", "Member", "Staff", "VIP"])
+    return pd.DataFrame({
+        "In Access Date/Time": entry.astype("datetime64[ns]"),
+        "Out Access Date/Time": (entry + stay).astype("datetime64[ns]"),
+        "Card Type": card_types[rng.integers(0, len(card_types), n_rows)],
+    })
+
+
+def benchmark(n_rows=2_000_000, days=30, run_loop=True):
+    """Time the sweep against the mask loop on synthetic data and check they agree."""
+    df = make_synthetic_parking(n_rows, days)
+    print(f"Synthetic data: {n_rows:,} rows over {days} days")
+
+    started = timer.perf_counter()
+    fast = occupancy(df)
+    fast_seconds = timer.perf_counter() - started
+    print(f"{'Sweep (1h)':<24}{fast_seconds:.3f}s")
+
+    for label, kwargs in [("Sweep (15min)", {"freq": "15min"}),
+                          ("Sweep (1D)", {"freq": "1D"}),
+                          ("Sweep (1h, Card Type)", {"by": "Card Type"})]:
+        started = timer.perf_counter()
+        occupancy(df, **kwargs)
+        print(f"{label:<24}{timer.perf_counter() - started:.3f}s")
+
+    if run_loop:
+        started = timer.perf_counter()
+        slow = occupancy_loop(df)
+        loop_seconds = timer.perf_counter() - started
+        print(f"{'Mask loop (1h)':<24}{loop_seconds:.3f}s")
+
+        counts = ["cars_in", "cars_out", "cars_inside"]
+        same = fast[["date", "hour"]].equals(slow[["date", "hour"]]) and \
+            (fast[counts].to_numpy() == slow[counts].to_numpy()).all()
+        print(f"Results identical: {same}")
+        print(f"Speedup: {loop_seconds / fast_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    import sys
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    benchmark(n_rows=rows)
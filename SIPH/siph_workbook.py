@@ -0,0 +1,158 @@
+import datetime
+import os
+import sys
+import tempfile
+import time as timer
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from excel_loader import read_sheets
+
+# Columns transform_insert_sql.py uses from each sheet of data.xlsx
+SHEET_COLUMNS = {
+    'data': ["MK", "HN", "CaseNo", "Med_Number", "Med_Description", "OrderID", "Priority", "Type",
+             "Department", "Clinic-Ward", "User", "New", "Active", "Final",
+             "Sum of New_to_Active_minutes", "Sum of Active_to_Final_minutes", "Sum of New_to_Final_minutes"],
+    'Department': ['key', 'Material Description', 'type'],
+    'Clinic': ['key', 'Material Description', 'type'],
+    'Form Responses 1': ['วันที่', 'VN', 'เวลาปลายทางได้รับ', 'ส่งทาง'],
+}
+
+
+CLOCK = r'(\d{1,2}):(\d{2})(?::(\d{2}))?'
+
+
+def seconds_since_midnight(series):
+    """
+    Time of day as whole seconds since midnight in an Int32 column.
+
+    Accepts datetime64 columns, datetime/time cells and text such as
+    '08:30:00' or '1/5/2024 08:30:00' (the last word is the time).
+    Blank and unreadable values become <NA>.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        seconds = (series - series.dt.normalize()) // pd.Timedelta(seconds=1)
+        return seconds.astype('Int32')
+
+    result = pd.Series(pd.NA, index=series.index, dtype='Int32')
+    is_clock = series.map(lambda v: isinstance(v, (datetime.time, datetime.datetime)))
+    if is_clock.any():
+        result[is_clock] = [v.hour * 3600 + v.minute * 60 + v.second for v in series[is_clock]]
+
+    is_text = series.map(lambda v: isinstance(v, str))
+    if is_text.any():
+        last_word = series[is_text].str.split().str[-1]
+        parts = last_word.str.fullmatch(CLOCK) & last_word.notna()
+        hms = last_word[parts].str.extract(CLOCK).fillna('0').astype('int32')
+        valid = (hms[0] < 24) & (hms[1] < 60) & (hms[2] < 60)
+        hms = hms[valid]
+        result[hms.index] = (hms[0] * 3600 + hms[1] * 60 + hms[2]).astype('int32')
+    return result
+
+
+def load_siph_workbook(excel_file):
+    """
+    Read the four sheets of data.xlsx in one pass with the types the pipeline needs.
+
+    Returns:
+        (df, df1, df2, df3) for the data, Department, Clinic and
+        Form Responses 1 sheets. In `df`, "New" holds the date as datetime64
+        and "time_s" the time of day in seconds (Int32); in `df3`, "วันที่"
+        is datetime64 and "received_s" is the time of day of
+        "เวลาปลายทางได้รับ" (kept as read) in seconds.
+    """
+    sheets = read_sheets(excel_file, SHEET_COLUMNS)
+
+    df = sheets['data']
+    df['CaseNo'] = df['CaseNo'].astype('int64')
+    df['Med_Number'] = df['Med_Number'].astype('int64')
+    new = pd.to_datetime(df['New'])
+    df['New'] = new.dt.normalize()
+    df['time_s'] = seconds_since_midnight(new)
+
+    df1 = sheets['Department']
+    df2 = sheets['Clinic']
+
+    df3 = sheets['Form Responses 1']
+    df3['วันที่'] = pd.to_datetime(df3['วันที่'], errors='coerce')
+    df3['VN'] = pd.to_numeric(df3['VN'], errors='coerce').astype('Int64')
+    df3['received_s'] = seconds_since_midnight(df3['เวลาปลายทางได้รับ'])
+
+    return df, df1, df2, df3
+
+
+# --------------------------- Benchmark ---------------------------
+
+def make_synthetic_workbook(path, n_rows=50_000, extra_columns=10, seed=0):
+    """Write a data.xlsx look-alike: the used columns plus `extra_columns` the pipeline ignores."""
+    rng = np.random.default_rng(seed)
+    start = datetime.datetime(2024, 5, 1)
+    wb = Workbook(write_only=True)
+
+    ws = wb.create_sheet('data')
+    extras = [f"Extra{k}" for k in range(extra_columns)]
+    ws.append(SHEET_COLUMNS['data'] + extras)
+    for i in range(n_rows):
+        new = start + datetime.timedelta(minutes=int(rng.integers(0, 31 * 24 * 60)))
+        ws.append([
+            "A", f"{rng.integers(10 ** 7, 10 ** 8)}", int(rng.integers(1, 10 ** 9)), int(rng.integers(1000, 1100)),
+            "PARACETAMOL 500 MG TAB", i, "Routine", "OPD", f"D{rng.integers(0, 20)}", f"C{rng.integers(0, 40)}",
+            "staff", new, new + datetime.timedelta(minutes=5), new + datetime.timedelta(minutes=12),
+            5.0, 7.0, 12.0,
+        ] + [f"x{k}" for k in range(extra_columns)])
+
+    for sheet in ('Department', 'Clinic'):
+        ws = wb.create_sheet(sheet)
+        ws.append(SHEET_COLUMNS[sheet])
+        for med in range(1000, 1100):
+            ws.append([f"{med}_{'D' if sheet == 'Department' else 'C'}{med % 20}", "Material", "T"])
+
+    ws = wb.create_sheet('Form Responses 1')
+    ws.append(SHEET_COLUMNS['Form Responses 1'])
+    for _ in range(n_rows // 2):
+        received = start + datetime.timedelta(minutes=int(rng.integers(0, 31 * 24 * 60)))
+        ws.append([received.replace(hour=0, minute=0), int(rng.integers(1, 10 ** 9)), received, "Tube"])
+    wb.save(path)
+
+
+def _load_previous(excel_file):
+    """The four read_excel calls and string round trips the script used before."""
+    df = pd.read_excel(excel_file, sheet_name='data', converters={'CaseNo': int, 'Med_Number': int}, engine='openpyxl')
+    df1 = pd.read_excel(excel_file, sheet_name='Department', engine='openpyxl')
+    df2 = pd.read_excel(excel_file, sheet_name='Clinic', engine='openpyxl')
+    df3 = pd.read_excel(excel_file, sheet_name='Form Responses 1', engine='openpyxl')
+    df3['วันที่'] = pd.to_datetime(df3['วันที่'], errors='coerce')
+    df['time'] = pd.to_datetime(df['New']).dt.time
+    df['New'] = pd.to_datetime(df['New']).dt.date
+    pd.to_timedelta(df['time'].astype(str))
+    pd.to_timedelta(df3['เวลาปลายทางได้รับ'].astype(str).str.split().str[-1])
+    return df, df1, df2, df3
+
+
+def benchmark(n_rows=20_000):
+    """Compare load time and peak Python memory of the old and new loading code."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'data.xlsx')
+        make_synthetic_workbook(path, n_rows)
+        print(f"Synthetic data.xlsx: {n_rows:,} data rows, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        for name, load in (("4x read_excel", _load_previous), ("load_siph_workbook", load_siph_workbook)):
+            started = timer.perf_counter()
+            frames = load(path)
+            elapsed = timer.perf_counter() - started
+            kept = sum(f.memory_usage(deep=True).sum() for f in frames)
+
+            # Separate traced run: tracemalloc slows the load too much to time it
+            tracemalloc.start()
+            load(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:<20}{elapsed:>8.2f}s  peak {peak / 1e6:>7.1f} MB  frames {kept / 1e6:>6.1f} MB")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,83 @@
+import logging
+import os
+
+import pandas as pd
+
+
+def snapshot_label(months):
+    """'2024-05' for one report month, '2024-01_2024-12' for a range."""
+    first, last = str(months[0]), str(months[-1])
+    return first if first == last else f"{first}_{last}"
+
+
+def snapshot_path(snapshot_dir, name, label):
+    return os.path.join(snapshot_dir, f"{name}_{label}.parquet")
+
+
+def _parquet_safe(df):
+    """
+    Copy of `df` with every mixed-type object column as text.
+
+    Parquet needs one type per column; columns such as Received_Time hold
+    datetime.time values next to strings. Missing values stay None.
+    """
+    mixed = [c for c in df.columns if df[c].dtype == object and df[c].dropna().map(type).nunique() > 1]
+    if not mixed:
+        return df
+    df = df.copy()
+    for c in mixed:
+        df[c] = df[c].map(lambda v: None if pd.isna(v) else str(v)).astype(object)
+    return df
+
+
+def write_snapshot(snapshot_dir, label, frames, compression="zstd"):
+    """
+    Save DataFrames as compressed Parquet files named by report month.
+
+    Args:
+        snapshot_dir: Folder for the snapshots
+        label: Report month label from snapshot_label()
+        frames: {name: DataFrame}, e.g. {"med_stat": df_total}
+        compression: Parquet codec
+
+    Mixed-type object columns are saved as text, so they load back as str.
+
+    Returns:
+        Names that were written; a frame that still cannot be saved (e.g. the
+        share is unreachable) is logged and skipped so the run itself goes on
+    """
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+    except OSError as e:
+        logging.warning(f"Warning: snapshot {label} not saved, {snapshot_dir} unavailable: {e}")
+        return []
+    written = []
+    for name, df in frames.items():
+        path = snapshot_path(snapshot_dir, name, label)
+        tmp_path = path + ".tmp"
+        try:
+            _parquet_safe(df).to_parquet(tmp_path, index=False, compression=compression)
+            os.replace(tmp_path, path)
+            written.append(name)
+        except Exception as e:
+            logging.warning(f"Warning: snapshot {name} not saved: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    logging.info(f"Snapshot {label} saved to {snapshot_dir}: {', '.join(written) or 'nothing'}")
+    return written
+
+
+def read_snapshot(snapshot_dir, label, names):
+    """
+    Load the named snapshots of one report month label.
+
+    Raises:
+        FileNotFoundError: when a snapshot is missing
+    """
+    frames = {}
+    for name in names:
+        path = snapshot_path(snapshot_dir, name, label)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No snapshot {name} for {label} in {snapshot_dir}")
+        frames[name] = pd.read_parquet(path)
+    return frames
@@ -2,18 +2,49 @@ import pandas as pd
 from datetime import datetime, time, timedelta
 import openpyxl
 import re
-import pyodbc
 import logging
 from logging.handlers import RotatingFileHandler
-import urllib
-import win32com.client
 import os
+import sys
+import argparse
 from pathlib import Path
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import text
+from incremental_load import add_row_keys, ensure_key_columns, upsert_table
+from bulk_loader import bulk_load
+from siph_workbook import load_siph_workbook
+from lookup_index import LookupIndex
+from excel_refresh import files_fingerprint, refresh_workbooks
+from snapshots import read_snapshot, snapshot_label, write_snapshot
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stage_metrics import StageRecorder
+from db_engine import get_engine
 
 
 excel_file = r"\\siphvmdata01\opd_stat_time\data\data.xlsx"
 
+# Default: report last month. --backfill FROM TO (YYYY-MM) rebuilds every month in the range
+# from one read of the workbook (data.xlsx must then hold the whole range).
+parser = argparse.ArgumentParser(description="Transform data.xlsx into med_stat / med_stat_summary")
+parser.add_argument("--backfill", nargs=2, metavar=("FROM", "TO"), help="first and last month, e.g. 2024-01 2024-12")
+parser.add_argument("--from-snapshot", action="store_true",
+                    help="skip refresh and transformation, insert the saved Parquet snapshot of the report month(s)")
+parser.add_argument("--snapshot-sources", action="store_true", help="also save the parsed source sheets")
+args = parser.parse_args()
+
+if args.backfill:
+    months = pd.period_range(args.backfill[0], args.backfill[1], freq='M')
+else:
+    months = pd.PeriodIndex([pd.Timestamp.now().to_period('M') - 1])
+first_day_last_month = months[0].start_time
+last_day_last_month = months[-1].end_time.floor('s')
+
+# df_total / df_summary of every run are kept here as Parquet, named by report month
+snapshot_dir = r"\\siphvmdata01\opd_stat_time\snapshots"
+
+# Lookup indexes kept between runs; rebuilt when the Department / Clinic sheets change
+lookup_cache_dir = r"\\siphvmdata01\opd_stat_time\cache"
+
 # --------------------------- Logging Setup ---------------------------
 log_path = Path(r"\\siphvmdata01\opd_stat_time\logs\opd_stat_time.log")
 
@@ -27,224 +58,251 @@ logging.basicConfig(
     force=True
 )
 
-def refresh_excel(excel_file):
-    logging.info("Starting Process Refresh Excel File")
-    abs_path = os.path.abspath(excel_file)
-
-    excel = None
-    workbook = None
-
-    try:
-        excel = win32com.client.Dispatch("Excel.Application")
-        excel.Visible = False
-        excel.DisplayAlerts = False
-        excel.AskToUpdateLinks = False
-        excel.UserControl = False
-
-        logging.info(f"Processing Refresh: {abs_path}")
-
-        workbook = excel.Workbooks.Open(abs_path)
-        workbook.RefreshAll()
-
-        excel.CalculateUntilAsyncQueriesDone()
+# Wall/CPU time, memory and rows per stage, one JSON line per stage next to the log
+stages = StageRecorder(log_path.with_suffix('.stages.jsonl'))
+logging.info(f"Report months: {months[0]} .. {months[-1]} ({len(months)})")
 
-        workbook.Save()
-        logging.info("Refresh Complete!")
+# --------------------------- Refresh Excel ---------------------------
+# Runs in a worker process (see excel_refresh.py); a hung refresh is killed after REFRESH_TIMEOUT
+# and the run continues with the data as last saved, as it does after any refresh error.
+REFRESH_TIMEOUT = 900
+# Files data.xlsx pulls its data from; when none of them changed since the last successful
+# refresh, the refresh is skipped. Leave empty to always refresh.
+REFRESH_SOURCES = []
+refresh_state = r"\\siphvmdata01\opd_stat_time\cache\refresh_state.json"
 
-    except Exception as e:
-        logging.error(f"Error: {e}")
-
-    finally:
-        if workbook is not None:
-            workbook.Close(False)
-        if excel is not None:
-            excel.Quit()
-
-refresh_excel(excel_file)
+if not args.from_snapshot:
+    logging.info("Starting Process Refresh Excel File")
+    with stages.stage("refresh"):
+        try:
+            refresh_workbooks([excel_file], backend="com", timeout=REFRESH_TIMEOUT,
+                              fingerprints={excel_file: files_fingerprint(REFRESH_SOURCES)} if REFRESH_SOURCES else None,
+                              state_path=refresh_state)
+        except Exception as e:
+            logging.error(f"Error: {e}")
 
 # --------------------------- Core Processing ---------------------------
-try:
-    logging.info("Starting Core Processing")
-
-    # --- 1. Load Data ---
+if args.from_snapshot:
+    with stages.stage("read") as stage:
+        frames = read_snapshot(snapshot_dir, snapshot_label(months), ["med_stat", "med_stat_summary"])
+        df_total, df_summary = frames["med_stat"], frames["med_stat_summary"]
+        stage["rows"] = len(df_total)
+    logging.info(f"Loaded snapshot {snapshot_label(months)}: {len(df_total)} rows, skipping refresh and transformation")
+else:
     try:
-        df = pd.read_excel(excel_file, sheet_name='data', converters={'CaseNo':int,'Med_Number':int}, engine='openpyxl')
-        df1 = pd.read_excel(excel_file, sheet_name='Department', engine='openpyxl')
-        df2 = pd.read_excel(excel_file, sheet_name='Clinic', engine='openpyxl')
-        df3 = pd.read_excel(excel_file, sheet_name='Form Responses 1', engine='openpyxl')
-    except FileNotFoundError:
-        logging.error(f"Error: Not found file {excel_file}")
-        raise
-    except ValueError as e:
-        logging.error(f"Error:{e}")
-        raise
-
-    # --- 2. Data Transformation (Date/Time) ---
-    df3['วันที่'] = pd.to_datetime(df3['วันที่'], errors='coerce')
-    
-    first_day_this_month = pd.Timestamp.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    first_day_last_month = first_day_this_month - pd.offsets.MonthBegin(1)
-    last_day_last_month = first_day_this_month - pd.Timedelta(seconds=1)
-
-    df3 = df3[df3['วันที่'].between(first_day_last_month, last_day_last_month)].copy()
-
-    # --- 3. Create Keys & Merging ---
-    logging.info("Creating Keys and Merging DataFrames")
-   
-    df['time'] = pd.to_datetime(df['New']).dt.time
-    df['New'] = pd.to_datetime(df['New']).dt.date
-    df['key_department'] = df['Med_Number'].astype(str) + '_' + df['Department'].astype(str)
-    df['key_clinic'] = df['Med_Number'].astype(str) + '_' + df['Clinic-Ward'].astype(str)
-
-    # --- 4. Lookup Tables ---
-    df1_lookup = (df1[['key', 'Material Description','type']]
-                  .drop_duplicates(subset=['key'])
-                  .rename(columns={'key': 'key_department', 'Material Description': 'Mat_Department','type':'Type_Department'}))
-
-    df2_lookup = (df2[['key', 'Material Description','type']]
-                  .drop_duplicates(subset=['key'])
-                  .rename(columns={'key': 'key_clinic', 'Material Description': 'Mat_Clinic','type':'Type_Clinic'}))
-
-    merged_df = df.merge(df1_lookup, on='key_department', how='left') \
-                  .merge(df2_lookup, on='key_clinic', how='left')
-
-    # --- 5. Filtering & Splitting ---
-    logging.info("Filtering DataFrames")
-    floor_list = df['Department'].dropna().unique().tolist()
-    clinic_list = df['Clinic-Ward'].dropna().unique().tolist()
-
-    is_floor = merged_df['Department'].isin(floor_list) & merged_df['Mat_Department'].notna()
-    is_clinic = merged_df['Clinic-Ward'].isin(clinic_list) & merged_df['Mat_Clinic'].notna()
-
-    df_remaining = merged_df[~(is_floor | is_clinic)].copy()
-    df_excluded = merged_df[is_floor | is_clinic].copy()
-
-    # --- 6. Calculate Summary Times ---
-    logging.info("Calculating Summary Times")
-    df3_lookup = (df3.dropna(subset=['VN'])
-                  .drop_duplicates(subset='VN', keep='first')
-                  [['VN', 'เวลาปลายทางได้รับ', 'ส่งทาง']])
-
-    df_calc = (df_remaining.merge(df3_lookup, how='left', left_on='CaseNo', right_on='VN')
-               .query("ส่งทาง.notna() and VN.notna()"))
+        logging.info("Starting Core Processing")
+
+        # --- 1. Load Data ---
+        # One pass over the workbook, used columns only, dates/times parsed once (see siph_workbook.py)
+        with stages.stage("read") as stage:
+            try:
+                df, df1, df2, df3 = load_siph_workbook(excel_file)
+            except FileNotFoundError:
+                logging.error(f"Error: Not found file {excel_file}")
+                raise
+            except (KeyError, ValueError) as e:
+                logging.error(f"Error:{e}")
+                raise
+            stage["rows"] = len(df)
+
+        if args.snapshot_sources:
+            write_snapshot(snapshot_dir, snapshot_label(months), {
+                "source_data": df, "source_department": df1, "source_clinic": df2, "source_form": df3})
+
+        # --- 2. Data Transformation (Date/Time) ---
+        df3 = df3[df3['วันที่'].between(first_day_last_month, last_day_last_month)].copy()
+
+        # Month each row is reported in: form rows by their date; data rows by order date when
+        # backfilling, otherwise every row belongs to the single report month as before
+        df3['month'] = df3['วันที่'].dt.to_period('M')
+        df['month'] = df['New'].dt.to_period('M') if args.backfill else months[0]
+
+        with stages.stage("merge") as stage:
+            # --- 3. Lookup Tables ---
+            # Keys are integer-encoded once per sheet and cached until the sheet changes (see lookup_index.py)
+            logging.info("Looking up Department / Clinic materials")
+            dept_index = LookupIndex.cached(lookup_cache_dir, 'department', df1, 'from_joined_key',
+                                            'key', ['Material Description', 'type'])
+            clinic_index = LookupIndex.cached(lookup_cache_dir, 'clinic', df2, 'from_joined_key',
+                                              'key', ['Material Description', 'type'])
+
+            # --- 4. Merging ---
+            dept = dept_index.lookup(df['Med_Number'], df['Department'])
+            clinic = clinic_index.lookup(df['Med_Number'], df['Clinic-Ward'])
+
+            merged_df = df
+            merged_df['Mat_Department'], merged_df['Type_Department'] = dept['Material Description'], dept['type']
+            merged_df['Mat_Clinic'], merged_df['Type_Clinic'] = clinic['Material Description'], clinic['type']
+
+            # --- 5. Filtering & Splitting ---
+            logging.info("Filtering DataFrames")
+            floor_list = df['Department'].dropna().unique().tolist()
+            clinic_list = df['Clinic-Ward'].dropna().unique().tolist()
+
+            is_floor = merged_df['Department'].isin(floor_list) & merged_df['Mat_Department'].notna()
+            is_clinic = merged_df['Clinic-Ward'].isin(clinic_list) & merged_df['Mat_Clinic'].notna()
+
+            in_range = merged_df['month'].isin(months)
+            df_remaining = merged_df[~(is_floor | is_clinic) & in_range].copy()
+            df_excluded = merged_df[(is_floor | is_clinic) & in_range].copy()
+            stage["rows"] = len(merged_df)
+
+        with stages.stage("calc") as stage:
+            # --- 6. Calculate Summary Times ---
+            logging.info("Calculating Summary Times")
+            form_index = LookupIndex.from_columns(df3, ['month', 'VN'], ['เวลาปลายทางได้รับ', 'received_s', 'ส่งทาง'])
+            form = form_index.lookup(df_remaining['month'], df_remaining['CaseNo'])
+            has_form = form['ส่งทาง'].notna()
+            df_calc = df_remaining[has_form].copy()
+            df_calc[form.columns] = form[has_form]
     
-    try:
-        df_calc = df_calc.assign(
-            time_td = lambda x: pd.to_timedelta(x['time'].astype(str)),
-            Summary = lambda x: pd.to_timedelta(x['เวลาปลายทางได้รับ'].astype(str).str.split().str[-1]) - 
-                               pd.to_timedelta(x['time'].astype(str))
-        )
-    except Exception as e:
-        logging.warning(f"Warning: การคำนวณ Summary ผิดพลาด (ตรวจสอบ Format เวลา) - {e}")
-        df_calc['Summary'] = pd.NaT
-
-    # --- 7. Final Clean up ---
-    df_final = (df_calc[df_calc['Summary'] >= pd.Timedelta(0)]
-                .sort_values(by=['CaseNo', 'New', 'Summary'])
-                .drop_duplicates(subset=['CaseNo', 'New'], keep='first')
-                .drop(columns=['Mat_Department', 'Mat_Clinic', 'VN', 'time_td'], errors='ignore'))
-
-    df_15min = df_final[df_final['Summary'] <= pd.Timedelta(minutes=15)]
-
-    new_columns = ["MK", "HN", "CaseNo", "Med_Number", "Med_Description", "OrderID", "Priority", 
-                   "Type", "Department", "Clinic-Ward", "User", "New", "time", "Active", 
-                   "Final", "Sum of New_to_Active_minutes", "Sum of Active_to_Final_minutes", 
-                   "Sum of New_to_Final_minutes", "เวลาปลายทางได้รับ", "Summary", "ส่งทาง"]
-
-    def reorder_columns(df, cols):
-        return df.reindex(columns=[c for c in cols if c in df.columns])
-
-# Rename for SQL compatibility
-    column_mapping = {
-            'Priority': 'Med_Priority',
-            'Type': 'Med_Type',
-            'User': 'User_Staff',
-            'New': 'New_Date',
-            'time': 'New_Time',
-            'Clinic-Ward': 'Clinic_Ward',
-            'เวลาปลายทางได้รับ': 'Received_Time',
-            'Summary': 'Summary_Interval',
-            'ส่งทาง': 'Transport_Method'
-        }
+            # Summary in seconds, integer arithmetic on the time of day (see siph_workbook.py)
+            unreadable = df_calc['received_s'].isna() | df_calc['time_s'].isna()
+            if unreadable.any():
+                logging.warning(f"Warning: การคำนวณ Summary ผิดพลาด (ตรวจสอบ Format เวลา) - "
+                                f"{unreadable.sum()} rows with unreadable time skipped, e.g. CaseNo "
+                                f"{df_calc.loc[unreadable, 'CaseNo'].head(5).tolist()}")
+            df_calc['Summary'] = df_calc['received_s'] - df_calc['time_s']
+
+            # --- 7. Final Clean up ---
+            df_final = (df_calc[(df_calc['Summary'] >= 0).fillna(False)]
+                        .sort_values(by=['CaseNo', 'New', 'Summary'])
+                        .drop_duplicates(subset=['CaseNo', 'New'], keep='first')
+                        .drop(columns=['Mat_Department', 'Mat_Clinic', 'received_s'], errors='ignore'))
+
+            df_15min = df_final[df_final['Summary'] <= 15 * 60]
+
+            # Per-month counts in one groupby each
+            target_counts = df_15min.groupby('month').size().reindex(months, fill_value=0)
+            final_counts = df_final.groupby('month').size().reindex(months, fill_value=0)
+            excluded_counts = df_excluded.groupby('month').size().reindex(months, fill_value=0)
+
+            new_columns = ["MK", "HN", "CaseNo", "Med_Number", "Med_Description", "OrderID", "Priority", 
+                           "Type", "Department", "Clinic-Ward", "User", "New", "time_s", "Active", 
+                           "Final", "Sum of New_to_Active_minutes", "Sum of Active_to_Final_minutes", 
+                           "Sum of New_to_Final_minutes", "เวลาปลายทางได้รับ", "Summary", "ส่งทาง"]
+
+            def reorder_columns(df, cols):
+                return df.reindex(columns=[c for c in cols if c in df.columns])
+
+            # Rename for SQL compatibility
+            column_mapping = {
+                    'Priority': 'Med_Priority',
+                    'Type': 'Med_Type',
+                    'User': 'User_Staff',
+                    'New': 'New_Date',
+                    'time_s': 'New_Time',
+                    'Clinic-Ward': 'Clinic_Ward',
+                    'เวลาปลายทางได้รับ': 'Received_Time',
+                    'Summary': 'Summary_Interval',
+                    'ส่งทาง': 'Transport_Method'
+                }
     
-    df_final = reorder_columns(df_final, new_columns).rename(columns=column_mapping)
-    df_excluded = reorder_columns(df_excluded, new_columns).rename(columns=column_mapping)
+            df_final = reorder_columns(df_final, new_columns).rename(columns=column_mapping)
+            df_excluded = reorder_columns(df_excluded, new_columns).rename(columns=column_mapping)
 
-    df_final['is_excluded'] = 0
-    df_excluded['is_excluded'] = 1
-    
-    df_final['Summary_Interval'] = df_final['Summary_Interval'].dt.total_seconds().fillna(0).astype(int)
-
-    df_total = pd.concat([df_final, df_excluded], ignore_index=True)
-    # --- 8. Output ---
-    target = len(df_15min) + len(df_excluded)
-    overall = len(df_final) + len(df_excluded)
-
-    # print(f"Date >> {first_day_last_month.strftime('%d/%m/%Y')}")
-    # print(f"Target >> {target}")
-    # print(f"Overall >> {overall}")
-
-    data = {
-        'Report_Date': [first_day_last_month]
-        ,'Target_Count': [target]
-        ,'Overall_Count': [overall]
-    }
+            # Back to plain date / time values for the DATE and TIME columns in SQL
+            for frame in (df_final, df_excluded):
+                frame['New_Date'] = frame['New_Date'].dt.date
+                frame['New_Time'] = (pd.Timestamp(0) + pd.to_timedelta(frame['New_Time'], unit='s')).dt.time
+
+            df_final['is_excluded'] = 0
+            df_excluded['is_excluded'] = 1
     
-    df_summary = pd.DataFrame(data)
-    logging.info("Transformation Complete!")
+            df_final['Summary_Interval'] = df_final['Summary_Interval'].fillna(0).astype(int)
+
+            df_total = pd.concat([df_final, df_excluded], ignore_index=True)
+            stage["rows"] = len(df_total)
+        # --- 8. Output ---
+        # One row per report month
+        data = {
+            'Report_Date': months.to_timestamp()
+            ,'Target_Count': (target_counts + excluded_counts).to_numpy()
+            ,'Overall_Count': (final_counts + excluded_counts).to_numpy()
+        }
 
-except KeyError as e:
-    logging.error(f"Error: {e}")
-except Exception as e:
-    logging.error(f"Unexpected Error:{e}")
+        df_summary = pd.DataFrame(data)
 
-# ---------------- SQL Insertion ---------------------------
+        # A month without source rows would be stored as 0/0 and then skipped as existing
+        # on every later run, so its real counts could never be inserted
+        empty = (final_counts + excluded_counts).to_numpy() == 0
+        if empty.any():
+            logging.warning(f"Warning: no rows for {', '.join(str(m) for m in months[empty])}; "
+                            f"not writing med_stat_summary for those months")
+            df_summary = df_summary[~empty].reset_index(drop=True)
+        logging.info("Transformation Complete!")
 
-SERVER = "xxx"
-DATABASE = "xxx"
-USERNAME = "xxx"
-PASSWORD = "xxx"
+        # Lets the SQL step be re-run with --from-snapshot
+        write_snapshot(snapshot_dir, snapshot_label(months), {"med_stat": df_total, "med_stat_summary": df_summary})
 
-quoted_password = urllib.parse.quote_plus(PASSWORD)
+    except KeyError as e:
+        logging.error(f"Error: {e}")
+    except Exception as e:
+        logging.error(f"Unexpected Error:{e}")
+
+# ---------------- SQL Insertion ---------------------------
 
 # --- Checking ---
-date_str = first_day_last_month.strftime('%Y-%m-%d')
-check_query = text("SELECT TOP 1 report_date FROM med_stat_summary WHERE report_date = :d")
+check_query = text("SELECT report_date FROM med_stat_summary WHERE report_date BETWEEN :first AND :last")
 
-# --- Setup Connection String ---
-connection_string = (
-    f"mssql+pyodbc://{USERNAME}:{quoted_password}@{SERVER}/{DATABASE}"
-    "?driver=ODBC+Driver+17+for+SQL+Server"
-)
-engine = create_engine(connection_string)
+# --- Connection ---
+# Server and login come from the SIPH_DB_* environment variables (see db_engine.py);
+# SIPH_DB_URL=sqlite:///... runs the insert against a local stand-in
+
+# --- Load mode ---
+# "incremental": send only new/changed rows and MERGE them into med_stat (table stays readable)
+# "reload": TRUNCATE and re-insert everything
+LOAD_MODE = "incremental"
+# One med_stat row per medication line (Med_Number) of an order; repeats get an occurrence number
+ROW_KEY = ['CaseNo', 'New_Date', 'OrderID', 'Med_Number']
 
-# --- fast_executemany ---
-@event.listens_for(engine, "before_cursor_execute")
-def receive_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-    if executemany:
-        cursor.fast_executemany = True
+# Bulk path: None picks by dialect (tuned executemany on SQL Server). Set BULK_STAGING_DIR to a
+# share the SQL Server service account can read to switch to CSV staging + BULK INSERT.
+BULK_STRATEGY = None
+BULK_STAGING_DIR = None
 
-# --- Execute Truncate and Insert ---
+# --- Load med_stat ---
 try:
-    with engine.begin() as conn:
-        logging.info("Truncating table: med_stat")
-        conn.execute(text("TRUNCATE TABLE dbo.med_stat"))
-        
-        logging.info("Inserting new data...med_stat")
-        df_total.to_sql('med_stat', con=conn, if_exists='append', index=False)
-    with engine.connect() as conn_read:
-        existing_data = pd.read_sql(check_query, conn_read, params={'d': date_str})
-
-    if existing_data.empty:
-        logging.info(f"No existing data for {date_str}. Inserting new data...med_stat_summary")
-        
-        with engine.begin() as conn_summary:
-            df_summary.to_sql('med_stat_summary', con=conn_summary, if_exists='append', index=False)
-            logging.info(f"Success: Data for {date_str} inserted into summary.")
-    else:
-        logging.info(f"Skip: Data for {date_str} already exists. Skipping insertion.")
-        
+    engine = get_engine(prefix="SIPH_DB")
+    # SQL Server tables live in dbo; a SQLite stand-in has no schemas
+    schema = 'dbo' if engine.dialect.name == 'mssql' else None
+
+    # med_stat and med_stat_summary for every month are written in one transaction
+    with stages.stage("insert", rows=len(df_total)):
+        with engine.begin() as conn:
+            if LOAD_MODE == "incremental":
+                logging.info("Merging changed rows into: med_stat")
+                counts = upsert_table(conn, df_total, 'med_stat', ROW_KEY, schema=schema,
+                                      strategy=BULK_STRATEGY, staging_dir=BULK_STAGING_DIR)
+                logging.info(f"med_stat: {counts['inserted']} inserted, {counts['updated']} updated, "
+                             f"{counts['deleted']} deleted, {counts['unchanged']} unchanged")
+            else:
+                logging.info("Truncating table: med_stat")
+                conn.execute(text("TRUNCATE TABLE dbo.med_stat" if schema else "DELETE FROM med_stat"))
+
+                logging.info("Inserting new data...med_stat")
+                ensure_key_columns(conn, 'med_stat', schema=schema)
+                bulk_load(conn, add_row_keys(df_total, ROW_KEY), 'med_stat', schema=schema,
+                          strategy=BULK_STRATEGY, staging_dir=BULK_STAGING_DIR)
+
+            # med_stat_summary: skip every report_date that already exists, insert the rest
+            existing_data = pd.read_sql(check_query, conn, params={
+                'first': first_day_last_month.strftime('%Y-%m-%d'), 'last': last_day_last_month.strftime('%Y-%m-%d')})
+            existing_dates = set(pd.to_datetime(existing_data['report_date']).dt.strftime('%Y-%m-%d'))
+            report_dates = df_summary['Report_Date'].dt.strftime('%Y-%m-%d')
+
+            for date_str in sorted(existing_dates & set(report_dates)):
+                logging.info(f"Skip: Data for {date_str} already exists. Skipping insertion.")
+            new_summary = df_summary[~report_dates.isin(existing_dates)]
+            if not new_summary.empty:
+                logging.info(f"No existing data for {', '.join(report_dates[new_summary.index])}. "
+                             f"Inserting new data...med_stat_summary")
+                new_summary.to_sql('med_stat_summary', con=conn, if_exists='append', index=False)
+                logging.info(f"Success: {len(new_summary)} month(s) inserted into summary.")
+
     logging.info("Process Complete successfully.")
 
 except Exception as e:
     logging.error(f"SQL Error: {e}")
+
+logging.info("Stage summary:\n" + stages.summary())
@@ -0,0 +1,129 @@
+"""
+Shared SQLAlchemy engines for the SQL scripts.
+
+Connection details come from environment variables instead of the scripts,
+under a per-job prefix (e.g. SIPH_DB, DRG_DB):
+
+    {PREFIX}_URL        full SQLAlchemy URL; wins over everything else,
+                        e.g. sqlite:///C:/temp/siph.db for a local stand-in
+    {PREFIX}_SERVER     SQL Server host
+    {PREFIX}_DATABASE   database name
+    {PREFIX}_USERNAME   login (leave unset for Windows authentication)
+    {PREFIX}_PASSWORD   password
+    {PREFIX}_DRIVER     ODBC driver (default: ODBC Driver 17 for SQL Server)
+
+`get_engine` returns one engine per URL per process, with a connection pool,
+pre-ping (a dropped connection is replaced instead of failing the job) and
+the dialect's bulk settings, so a job opens its connection once and reuses it.
+
+Usage:
+    engine = get_engine(prefix="SIPH_DB")
+    with engine.begin() as conn:
+        ...
+"""
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+
+DEFAULT_DRIVER = "ODBC Driver 17 for SQL Server"
+
+# Pool settings for server databases; SQLite uses SQLAlchemy's own pool choice
+POOL_OPTIONS = {"pool_size": 5, "max_overflow": 5, "pool_timeout": 30, "pool_recycle": 1800}
+
+_engines = {}
+
+
+def database_url(prefix="SIPH_DB"):
+    """
+    Build the connection URL from the {prefix}_* environment variables.
+
+    Raises:
+        ValueError: when neither {prefix}_URL nor server and database are set
+    """
+    env = os.environ
+    if env.get(f"{prefix}_URL"):
+        return make_url(env[f"{prefix}_URL"])
+
+    server, database = env.get(f"{prefix}_SERVER"), env.get(f"{prefix}_DATABASE")
+    if not server or not database:
+        raise ValueError(f"Set {prefix}_URL, or {prefix}_SERVER and {prefix}_DATABASE")
+
+    query = {"driver": env.get(f"{prefix}_DRIVER", DEFAULT_DRIVER)}
+    username = env.get(f"{prefix}_USERNAME")
+    if not username:
+        query["Trusted_Connection"] = "yes"
+    return URL.create("mssql+pyodbc", username=username or None, password=env.get(f"{prefix}_PASSWORD") or None,
+                      host=server, database=database, query=query)
+
+
+def dialect_options(url):
+    """create_engine() keyword arguments for the URL's dialect."""
+    url = make_url(url)
+    options = {"pool_pre_ping": True}
+    if url.get_backend_name() != "sqlite":
+        options.update(POOL_OPTIONS)
+    if url.get_backend_name() == "mssql" and url.get_driver_name() == "pyodbc":
+        # Array-bound executemany: one round trip per batch instead of one per row
+        options["fast_executemany"] = True
+    return options
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def get_engine(url=None, prefix="SIPH_DB", **kwargs):
+    """
+    Return the process-wide engine for `url` (default: from the {prefix}_* variables).
+
+    Args:
+        url: SQLAlchemy URL, or None to read it with database_url(prefix)
+        prefix: Environment variable prefix
+        **kwargs: Extra create_engine() arguments, overriding the defaults;
+            only used when the engine is first created
+    """
+    url = make_url(url) if url is not None else database_url(prefix)
+    key = url.render_as_string(hide_password=False)
+    if key not in _engines:
+        engine = create_engine(url, **{**dialect_options(url), **kwargs})
+        if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+            event.listen(engine, "connect", _sqlite_pragmas)
+        _engines[key] = engine
+    return _engines[key]
+
+
+def dispose_all():
+    """Close every pooled connection, e.g. at the end of a job or before forking workers."""
+    for engine in _engines.values():
+        engine.dispose()
+    _engines.clear()
+
+
+def demo():
+    """Three jobs against a temporary SQLite database share one pooled connection."""
+    import tempfile
+
+    from sqlalchemy import text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DEMO_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'demo.db')}"
+        engine = get_engine(prefix="DEMO_DB")
+        connects = []
+        event.listen(engine, "connect", lambda *args: connects.append(1))
+
+        for job in range(3):
+            with get_engine(prefix="DEMO_DB").begin() as conn:
+                conn.execute(text("CREATE TABLE IF NOT EXISTS runs (job INTEGER)"))
+                conn.execute(text("INSERT INTO runs VALUES (:job)"), [{"job": job}, {"job": job}])
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT COUNT(*) FROM runs")).scalar()
+        print(f"{rows} rows from 3 jobs, {len(connects)} database connection(s) opened")
+        dispose_all()
+
+
+if __name__ == "__main__":
+    demo()
@@ -0,0 +1,360 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from openpyxl import load_workbook
+
+
+def detect_header_row(rows, expected_columns=None, probe_rows=30):
+    """
+    Find the header row among the first `probe_rows` rows of a sheet.
+
+    Args:
+        rows: List of row tuples as returned by openpyxl `iter_rows(values_only=True)`
+        expected_columns: Column names the header must contain. When given, the
+            first row holding all of them is the header.
+        probe_rows: How many leading rows to look at
+
+    Returns:
+        0-based index of the header row (0 when nothing better is found)
+    """
+    probe = rows[:probe_rows]
+
+    if expected_columns:
+        expected = {str(c).strip() for c in expected_columns}
+        for index, row in enumerate(probe):
+            names = {str(v).strip() for v in row if v is not None}
+            if expected <= names:
+                return index
+        return 0
+
+    # Without hints, take the first row that is as wide as the widest text row:
+    # title/notes rows above a table usually fill only one or two cells.
+    widths = [sum(isinstance(v, str) and v.strip() != "" for v in row) for row in probe]
+    if not widths or max(widths) == 0:
+        return 0
+    return widths.index(max(widths))
+
+
+def _sheet_to_frame(rows, header_row, expected_columns):
+    if not rows:
+        return pd.DataFrame()
+
+    if header_row is None:
+        header_row = detect_header_row(rows, expected_columns)
+
+    header = list(rows[header_row]) if header_row < len(rows) else []
+    data = rows[header_row + 1:]
+    width = max([len(header)] + [len(r) for r in data])
+    header += [None] * (width - len(header))
+
+    df = pd.DataFrame(data, columns=range(width))
+
+    # Drop columns openpyxl reports for formatted-but-empty cells
+    keep = [i for i, h in enumerate(header) if h is not None or df[i].notna().any()]
+    df = df[keep]
+    df.columns = [header[i] for i in keep]
+    return df
+
+
+def read_workbook(file_path, sheet_name=None, header_row=0, expected_columns=None):
+    """
+    Read sheets of one workbook, opening the file only once.
+
+    Args:
+        file_path: Path to the .xlsx/.xlsm file
+        sheet_name: None for every sheet, or a sheet name / 0-based index
+        header_row: 0-based row holding the column names; rows above it are
+            skipped. None detects it with `detect_header_row`.
+        expected_columns: Column names used by header detection
+
+    Returns:
+        List of (sheet_name, DataFrame) tuples in workbook order
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheets = wb.worksheets
+        if sheet_name is not None:
+            worksheets = [worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]]
+
+        sheets = []
+        for ws in worksheets:
+            rows = list(ws.iter_rows(values_only=True))
+            sheets.append((ws.title, _sheet_to_frame(rows, header_row, expected_columns)))
+        return sheets
+    finally:
+        wb.close()
+
+
+def read_sheets(file_path, columns, header_row=0):
+    """
+    Read selected columns of several sheets, opening the workbook only once.
+
+    Only the requested cells are kept while the rows stream by, so wide
+    sheets cost no more memory than their used columns. Rows that are empty
+    in every requested column are dropped.
+
+    Args:
+        file_path: Path to the .xlsx/.xlsm file
+        columns: {sheet name: list of column names, or None for every column}
+        header_row: 0-based row holding the column names
+
+    Returns:
+        {sheet name: DataFrame} with columns in the requested order
+
+    Raises:
+        KeyError: when a sheet or a requested column does not exist
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        frames = {}
+        for sheet, wanted in columns.items():
+            rows = wb[sheet].iter_rows(values_only=True)
+            for _ in range(header_row):
+                next(rows, None)
+            header = [str(h).strip() if h is not None else None for h in next(rows, ())]
+
+            if wanted is None:
+                wanted = [h for h in header if h is not None]
+            missing = [c for c in wanted if c not in header]
+            if missing:
+                raise KeyError(f"Sheet {sheet!r} has no column(s) {missing}")
+            positions = [header.index(c) for c in wanted]
+
+            data = []
+            for row in rows:
+                values = tuple(row[i] if i < len(row) else None for i in positions)
+                if any(v is not None for v in values):
+                    data.append(values)
+            frames[sheet] = pd.DataFrame.from_records(data, columns=wanted)
+        return frames
+    finally:
+        wb.close()
+
+
+def _read_file(file_path, sheet_name, header_row, expected_columns):
+    """Process-pool worker: return (file_path, sheets, error message)."""
+    try:
+        return file_path, read_workbook(file_path, sheet_name, header_row, expected_columns), None
+    except Exception as e:
+        return file_path, [], str(e)
+
+
+def _cacheable(df):
+    """
+    Return `df` in the form a `SheetCache` stores it.
+
+    Parquet needs one type per column: object columns holding values of more
+    than one Python type (e.g. numbers and text in an HN column) become text,
+    missing values staying missing. Header cells that JSON cannot hold are
+    turned into text the same way, so a cache hit and a fresh parse agree.
+    """
+    df = df.copy()
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        if column.dtype == object and column.dropna().map(type).nunique() > 1:
+            df.isetitem(i, column.map(lambda v: v if pd.isna(v) else str(v)))
+    df.columns = [c if c is None or isinstance(c, (str, int, float)) else str(c) for c in df.columns]
+    return df
+
+
+def file_hash(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SheetCache:
+    """
+    On-disk cache of parsed sheets, one Parquet file per sheet.
+
+    Sheets are stored with positional column names and the real header cells
+    (which may be None, numbers or repeats) are kept in the index; see
+    `_cacheable` for the column types.
+
+    Entries are keyed by absolute path and validated against file size and
+    mtime; when those differ the content hash decides, so a file that was
+    only touched or copied back still loads from the cache. The read options
+    are part of the key, so changing the header row re-parses the file.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, self.INDEX_NAME)
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.index = {}
+
+    def get(self, file_path, options):
+        """Return the cached [(sheet_name, DataFrame)] for a file, or None on a miss."""
+        key = os.path.abspath(file_path)
+        entry = self.index.get(key)
+        if entry is None or entry["options"] != options:
+            return None
+
+        stat = os.stat(file_path)
+        if (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            if entry["size"] != stat.st_size or entry["sha256"] != file_hash(file_path):
+                return None
+            entry["mtime_ns"] = stat.st_mtime_ns
+
+        try:
+            sheets = []
+            for sheet, name, columns in entry["sheets"]:
+                df = pd.read_parquet(os.path.join(self.cache_dir, name))
+                df.columns = columns
+                sheets.append((sheet, df))
+            return sheets
+        except (OSError, ValueError):
+            return None
+
+    def put(self, file_path, options, sheets):
+        """Store parsed sheets, as returned by `_cacheable`; a file that fails to write is skipped."""
+        key = os.path.abspath(file_path)
+        self._remove_files(key)
+        stem = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        stat = os.stat(file_path)
+
+        stored = []
+        try:
+            for i, (sheet, df) in enumerate(sheets):
+                name = f"{stem}_{i}.parquet"
+                stored.append([sheet, name, list(df.columns)])
+                df.set_axis([str(j) for j in range(df.shape[1])], axis=1).to_parquet(
+                    os.path.join(self.cache_dir, name), index=False)
+        except Exception as e:
+            print(f"Warning: not caching {file_path}: {e}")
+            for _, name, _ in stored:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+            return
+
+        self.index[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_hash(file_path),
+            "options": options,
+            "sheets": stored,
+        }
+
+    def evict_missing(self):
+        """Drop entries whose source file no longer exists. Returns how many were dropped."""
+        missing = [key for key in self.index if not os.path.exists(key)]
+        for key in missing:
+            self._remove_files(key)
+        return len(missing)
+
+    def save(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove_files(self, key):
+        entry = self.index.pop(key, None)
+        if entry is None:
+            return
+        for _, name, *_ in entry["sheets"]:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+def load_workbooks(file_paths, sheet_name=None, header_row=0, expected_columns=None, max_workers=None,
+                   cache_dir=None):
+    """
+    Read many workbooks in parallel and combine every sheet into one DataFrame.
+
+    Each file is opened once and all of its sheets are read in the same pass.
+    Files are spread over a process pool because openpyxl parsing is bound
+    by the GIL.
+
+    Args:
+        file_paths: Iterable of workbook paths
+        sheet_name: None for every sheet, or a sheet name / 0-based index
+        header_row: 0-based header row, or None to detect it
+        expected_columns: Column names used by header detection
+        max_workers: Number of processes (default: CPU count, 1 runs in-process)
+        cache_dir: Optional folder for a `SheetCache`. Unchanged files are
+            loaded from it and only new or modified workbooks are parsed;
+            entries for deleted files are evicted. Mixed-type columns come
+            back as text (see `_cacheable`), cached or not.
+
+    Returns:
+        Combined DataFrame with "FileName" and "SheetName" columns added
+    """
+    file_paths = list(file_paths)
+    if not file_paths:
+        return pd.DataFrame()
+
+    cache = None
+    results = {}
+    if cache_dir is not None:
+        cache = SheetCache(cache_dir)
+        options = [sheet_name, header_row, list(expected_columns or [])]
+        for file_path in file_paths:
+            sheets = cache.get(file_path, options)
+            if sheets is not None:
+                results[file_path] = (file_path, sheets, None)
+        print(f"Cache: {len(results)} unchanged, {len(file_paths) - len(results)} to parse")
+
+    to_parse = [file_path for file_path in file_paths if file_path not in results]
+    for result in _read_files(to_parse, sheet_name, header_row, expected_columns, max_workers):
+        if cache is not None and result[2] is None:
+            result = (result[0], [(sheet, _cacheable(df)) for sheet, df in result[1]], None)
+            cache.put(result[0], options, result[1])
+        results[result[0]] = result
+
+    if cache is not None:
+        cache.evict_missing()
+        cache.save()
+
+    return _combine(results[file_path] for file_path in file_paths)
+
+
+def _read_files(file_paths, sheet_name, header_row, expected_columns, max_workers):
+    if not file_paths:
+        return []
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(file_paths))
+    args = (file_paths, [sheet_name] * len(file_paths), [header_row] * len(file_paths),
+            [expected_columns] * len(file_paths))
+
+    if max_workers == 1:
+        return list(map(_read_file, *args))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_read_file, *args))
+
+
+def _combine(results):
+    all_data = []
+    for file_path, sheets, error in results:
+        if error is not None:
+            print(f"Error reading {file_path}: {error}")
+            continue
+        for sheet, df in sheets:
+            if df.empty:
+                print(f"Warning: {file_path} sheet {sheet} is empty!")
+                continue
+            df["FileName"] = file_path
+            df["SheetName"] = sheet
+            all_data.append(df)
+            print(f"processing file : {file_path} and sheet : {sheet} ({len(df)} rows)")
+
+    if not all_data:
+        return pd.DataFrame()
+    return pd.concat(all_data, ignore_index=True)
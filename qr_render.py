@@ -0,0 +1,275 @@
+"""
+Render QR code cards: one QR code and one caption placed on a template image.
+
+QrRenderer decodes the template once and copies it for every card, draws the
+QR modules straight at the target size (no 10 px-per-module image to shrink),
+renders each distinct caption once and reuses it, and writes PNGs with zlib
+level 1: PNG encoding is most of the time per card, and level 1 is about three
+times faster than Pillow's default 6 for files about a third larger.
+
+Usage:
+    renderer = QrRenderer("scan QR.jpg", "Sarabun-Regular.ttf")
+    for no, link, caption in rows:
+        renderer.save(link, caption, f"output/{caption}_{no}.png")
+
+render_batch() spreads rows over worker processes, each with its own renderer.
+
+Benchmark against the previous per-row code: python qr_render.py [images] [workers] [font]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+# The caption used to be drawn twice over itself; this mask curve gives the same darker edges in one pass
+DOUBLE_DRAW = [255 - (255 - v) * (255 - v) // 255 for v in range(256)]
+
+
+def load_font(font_path, font_size, fallback=True):
+    """
+    TrueType font at `font_size`. A font that cannot be loaded falls back to
+    Pillow's default font (no Thai glyphs) when `fallback` is set, and raises
+    OSError otherwise.
+    """
+    try:
+        return ImageFont.truetype(font_path, font_size)
+    except OSError:
+        if not fallback:
+            raise
+        print(f"Warning: Could not load font from {font_path}. Using default font.")
+        return ImageFont.load_default(font_size)
+
+
+def qr_modules(data, border=4):
+    """QR code of `data` as an image with one pixel per module (0 = black, 255 = white)"""
+    qr = qrcode.QRCode(version=1, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    modules = Image.new("L", (len(matrix), len(matrix)))
+    modules.putdata([0 if dark else 255 for row in matrix for dark in row])
+    return modules
+
+
+class QrRenderer:
+    """
+    Place a QR code and a centred caption on copies of one template image.
+
+    Args:
+        base_image_path: Template image
+        font_path: TrueType font for the caption
+        qr_position: Top-left corner of the QR code
+        qr_size: QR code width and height in pixels
+        font_size: Caption font size
+        text_offset: (horizontal, vertical) caption position; the caption is
+            centred on the image and moved right by `horizontal`
+        compress_level: PNG zlib level, 0-9 (Pillow's default is 6)
+        max_captions: Rendered captions kept for reuse
+        font_fallback: Use Pillow's default font when `font_path` cannot be
+            loaded, instead of raising OSError
+    """
+
+    def __init__(self, base_image_path, font_path, qr_position=(1140, 330), qr_size=375, font_size=36,
+                 text_offset=(250, 775), compress_level=1, max_captions=4096, font_fallback=True):
+        with Image.open(base_image_path) as image:
+            self.template = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        self.font = load_font(font_path, font_size, font_fallback)
+        self.qr_position = qr_position
+        self.qr_size = qr_size
+        self.text_offset = text_offset
+        self.compress_level = compress_level
+        self.max_captions = max_captions
+        self._captions = {}
+
+    def caption(self, text):
+        """(mask, position) of a caption, rendered on first use"""
+        layout = self._captions.get(text)
+        if layout is None:
+            left, top, right, bottom = self.font.getbbox(text)
+            mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)))
+            ImageDraw.Draw(mask).text((-left, -top), text, font=self.font, fill=255)
+            x = (self.template.width - (right - left)) // 2 + self.text_offset[0]
+            layout = (mask.point(DOUBLE_DRAW), (x + left, self.text_offset[1] + top))
+            if len(self._captions) >= self.max_captions:
+                self._captions.clear()
+            self._captions[text] = layout
+        return layout
+
+    def render(self, data, text):
+        """Card image for one QR payload and caption"""
+        image = self.template.copy()
+        qr_img = qr_modules(data).resize((self.qr_size, self.qr_size), Image.NEAREST)
+        image.paste(qr_img, self.qr_position)
+        mask, position = self.caption(text)
+        image.paste((0, 0, 0), position + (position[0] + mask.width, position[1] + mask.height), mask)
+        return image
+
+    def save(self, data, text, output_path):
+        self.render(data, text).save(output_path, compress_level=self.compress_level)
+
+
+# --------------------------- Batch rendering ---------------------------
+
+_renderer = None
+
+
+def _init_worker(base_image_path, font_path, options):
+    global _renderer
+    _renderer = QrRenderer(base_image_path, font_path, **options)
+
+
+def _render_rows(rows, output_folder):
+    """Worker: save cards for (no, data, caption) rows, return their paths"""
+    paths = []
+    for no, data, text in rows:
+        path = os.path.join(output_folder, f"{text}_{no}.png")
+        _renderer.save(data, text, path)
+        paths.append(path)
+    return paths
+
+
+def render_batch(rows, base_image_path, font_path, output_folder, max_workers=None, chunk_size=25, **options):
+    """
+    Save a card for every (no, data, caption) row as output_folder/{caption}_{no}.png.
+
+    Rows are sent to worker processes in chunks of `chunk_size`; each worker
+    loads the template and font once. Paths are yielded as chunks finish (not
+    in row order), with at most two chunks per worker in flight. The font is
+    not replaced by a fallback: a missing font raises OSError before any card
+    is rendered.
+
+    Args:
+        rows: Iterable of (no, data, caption)
+        base_image_path, font_path, **options: QrRenderer arguments
+        output_folder: Existing folder for the PNGs
+        max_workers: Number of processes (default: CPU count); 1 renders in
+            this process
+        chunk_size: Rows per task
+    """
+    options = {**options, "font_fallback": False}
+    # Fail here, not as a broken pool: workers would each hit the missing font
+    load_font(font_path, options.get("font_size", 36), fallback=False)
+
+    if max_workers == 1:
+        _init_worker(base_image_path, font_path, options)
+        for row in rows:
+            yield from _render_rows([row], output_folder)
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    pending = set()
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker,
+                             initargs=(base_image_path, font_path, options)) as executor:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) < chunk_size:
+                continue
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            pending.add(executor.submit(_render_rows, chunk, output_folder))
+            chunk = []
+        if chunk:
+            pending.add(executor.submit(_render_rows, chunk, output_folder))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+# --------------------------- Benchmark ---------------------------
+
+def render_previous(base_image_path, custom_font, data, concat_part, output_image_path,
+                    qr_position=(1140, 330), qr_size=375):
+    """One card the way the per-row loop in "QR Code and Text Generator" made it."""
+    qr = qrcode.QRCode(version=1, box_size=10)
+    qr.add_data(data)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill="black", back_color="white").resize((qr_size, qr_size))
+
+    base_image = Image.open(base_image_path)
+    base_image.paste(qr_img, qr_position)
+
+    draw = ImageDraw.Draw(base_image)
+    text_bbox = draw.textbbox((0, 0), concat_part, font=custom_font)
+    text_width = text_bbox[2] - text_bbox[0]
+    image_width, image_height = base_image.size
+    centered_position = ((image_width - text_width) // 2 + 250, 775)
+    draw.text(centered_position, concat_part, font=custom_font, fill="black")
+    draw.text(centered_position, concat_part, font=custom_font, fill=(0, 0, 0))
+    base_image.save(output_image_path)
+
+
+def benchmark(n_images=200, workers=None, font_path="Sarabun-Regular.ttf"):
+    """
+    Time the previous per-row code, QrRenderer and render_batch on a synthetic template.
+
+    Prints images/sec and file size for each, and the largest pixel difference
+    between the previous and the new output.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    captions = [f"Ward {i} อาคาร {i % 7}" for i in range(20)]
+    rows = [(i, f"https://forms.example.org/water?unit={i:05d}", captions[i % len(captions)])
+            for i in range(n_images)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_image_path = os.path.join(tmp, "template.jpg")
+        # Poster-like template: gradient background, coloured boxes, a little sensor noise
+        y, x = np.mgrid[0:1080, 0:1920]
+        pixels = np.stack([x * 255 // 1920, y * 255 // 1080, np.full(x.shape, 180)], axis=-1)
+        pixels = (pixels + rng.normal(0, 2, pixels.shape)).clip(0, 255).astype("uint8")
+        template = Image.fromarray(pixels)
+        draw = ImageDraw.Draw(template)
+        for i in range(30):
+            draw.rectangle((i * 60, 100 + i * 20, i * 60 + 200, 300 + i * 20), fill=(i * 8, 100, 200 - i * 5))
+        template.save(base_image_path, quality=90)
+        font = load_font(font_path, 36, fallback=False)
+        print(f"{n_images} cards, {len(captions)} distinct captions, template 1920x1080")
+        print(f"{'renderer':<22}{'seconds':>9}{'images/sec':>12}{'MB/image':>10}")
+
+        def run(name, render_one):
+            folder = os.path.join(tmp, name)
+            os.makedirs(folder)
+            started = time.perf_counter()
+            for no, link, caption in rows:
+                render_one(link, caption, os.path.join(folder, f"{caption}_{no}.png"))
+            elapsed = time.perf_counter() - started
+            size = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder)) / n_images / 1e6
+            print(f"{name:<22}{elapsed:>9.2f}{n_images / elapsed:>12.1f}{size:>10.2f}")
+            return folder
+
+        previous = run("previous", lambda link, caption, path: render_previous(base_image_path, font, link,
+                                                                                caption, path))
+        outputs = {}
+        for level in (6, 1):
+            renderer = QrRenderer(base_image_path, font_path, compress_level=level, font_fallback=False)
+            outputs[level] = run(f"QrRenderer level {level}", renderer.save)
+
+        workers = workers or os.cpu_count() or 1
+        folder = os.path.join(tmp, "batch")
+        os.makedirs(folder)
+        started = time.perf_counter()
+        count = sum(1 for _ in render_batch(rows, base_image_path, font_path, folder, workers))
+        elapsed = time.perf_counter() - started
+        print(f"{f'render_batch x{workers}':<22}{elapsed:>9.2f}{count / elapsed:>12.1f}")
+
+        worst = 0
+        for name in os.listdir(previous):
+            a = np.asarray(Image.open(os.path.join(previous, name)), dtype=int)
+            b = np.asarray(Image.open(os.path.join(outputs[1], name)), dtype=int)
+            worst = max(worst, int(np.abs(a - b).max()))
+        print(f"largest pixel difference from previous output: {worst}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200, int(sys.argv[2]) if len(sys.argv) > 2 else None,
+              *sys.argv[3:4])
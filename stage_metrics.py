@@ -0,0 +1,170 @@
+import datetime
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+def peak_rss_mb():
+    """Return the peak resident memory of this process in MB, or None if unavailable"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows has no resource module
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def current_rss_mb():
+    """Return the resident memory of this process right now in MB, or None if unavailable"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:  # Linux without psutil
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@contextmanager
+def sampled_peak_rss(interval=0.05):
+    """
+    Track the highest resident memory seen while the block runs.
+
+    A daemon thread samples `current_rss_mb` every `interval` seconds, so
+    unlike `peak_rss_mb` (the process high-water mark since start-up) the
+    figure belongs to this block alone, at no measurable cost. Yields a dict
+    with "start_mb" (resident memory on entry) and "peak_mb", filled in when
+    the block ends; both are None when unavailable. Memory kept by the
+    process from earlier work counts in both, so compare the two for the
+    growth caused by the block.
+    """
+    start = current_rss_mb()
+    info = {"start_mb": start, "peak_mb": start}
+    if info["peak_mb"] is None:
+        yield info
+        return
+
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            info["peak_mb"] = max(info["peak_mb"], current_rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield info
+    finally:
+        done.set()
+        sampler.join()
+        info["peak_mb"] = max(info["peak_mb"], current_rss_mb())
+
+
+class StageRecorder:
+    """
+    Record wall time, CPU time, peak memory growth and row counts per pipeline stage.
+
+    Every finished stage is appended to `jsonl_path` as one JSON line (so a run
+    that crashes half-way still leaves its numbers), and `summary()` formats
+    all stages of the run as a table.
+
+    Usage:
+        stages = StageRecorder("job.stages.jsonl")
+
+        with stages.stage("read") as stage:
+            df = pd.read_excel(...)
+            stage["rows"] = len(df)
+
+        @stages.track("insert")
+        def insert(df): ...
+
+        print(stages.summary())
+    """
+
+    def __init__(self, jsonl_path=None, run_id=None):
+        self.jsonl_path = jsonl_path
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time the enclosed block; set `stage["rows"]` inside it to record a row count."""
+        info = {"rows": rows}
+        record = {"run": self.run_id, "stage": name, "start": datetime.datetime.now().isoformat(timespec="seconds")}
+        rss_before = peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield info
+            record.update(status="ok", error=None)
+        except BaseException as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            rss_after = peak_rss_mb()
+            record.update(
+                wall_s=round(time.perf_counter() - wall_start, 3),
+                cpu_s=round(time.process_time() - cpu_start, 3),
+                peak_rss_mb=None if rss_after is None else round(rss_after, 1),
+                peak_rss_delta_mb=None if rss_after is None else round(rss_after - rss_before, 1),
+                rows=info.get("rows"),
+            )
+            self._write(record)
+
+    def track(self, name=None, rows=len):
+        """
+        Decorator form of `stage`.
+
+        Args:
+            name: Stage name (default: the function name)
+            rows: Function mapping the return value to a row count, or None
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__) as info:
+                    result = func(*args, **kwargs)
+                    if rows is not None:
+                        try:
+                            info["rows"] = rows(result)
+                        except TypeError:
+                            pass
+                    return result
+            return wrapper
+        return decorator
+
+    def _write(self, record):
+        self.records.append(record)
+        if self.jsonl_path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def summary(self):
+        """Table of this run's stages with their share of the total wall time."""
+        total = sum(r["wall_s"] for r in self.records) or 1.0
+        lines = [f"{'stage':<16}{'wall s':>9}{'cpu s':>9}{'share':>7}{'peak MB':>9}{'+MB':>8}{'rows':>11}  status"]
+        for r in self.records:
+            rows = "" if r["rows"] is None else f"{r['rows']:,}"
+            peak = "" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.0f}"
+            delta = "" if r["peak_rss_delta_mb"] is None else f"{r['peak_rss_delta_mb']:.0f}"
+            lines.append(f"{r['stage']:<16}{r['wall_s']:>9.2f}{r['cpu_s']:>9.2f}{r['wall_s'] / total:>7.0%}"
+                         f"{peak:>9}{delta:>8}{rows:>11}  {r['status']}")
+        lines.append(f"{'total':<16}{sum(r['wall_s'] for r in self.records):>9.2f}"
+                     f"{sum(r['cpu_s'] for r in self.records):>9.2f}")
+        return "\n".join(lines)